@@ -1,5 +1,6 @@
 import datetime
-from typing import Any, Dict, List, Set, Optional
+from typing import Any, Dict, Iterable, List, Set, Optional
+from contextlib import contextmanager, nullcontext
 
 import globals
 import Db_Sqlite
@@ -101,7 +102,8 @@ class Db:
         else:
             return None
 
-    def add_stock_trade(self, ticker_symbol: str, quantity: float, invest: float, trade_date: datetime.date) -> None:
+    def add_stock_trade(self, ticker_symbol: str, quantity: float, invest: float, trade_date: datetime.date,
+                        source_key: str | None = None) -> None:
         """
         Add a new stock trade to the active trades table.
 
@@ -110,9 +112,40 @@ class Db:
             quantity (float): The quantity traded.
             invest (float): The invested amount.
             trade_date (datetime.date): The date of the trade.
+            source_key (str or None): Statement row of an imported trade, skipped if already imported.
         """
         if self.db_sqlite is not None:
-            self.db_sqlite.add_stock_trade(ticker_symbol, quantity, invest, trade_date)
+            self.db_sqlite.add_stock_trade(ticker_symbol, quantity, invest, trade_date, source_key)
+
+    def add_stock_trades_bulk(self, trades: Iterable[tuple]) -> int:
+        """
+        Add many stock trades at once, skipping trades whose source_key was already imported.
+
+        Args:
+            trades: Iterable of (ticker_symbol, quantity, invest, trade_date[, source_key]) tuples.
+
+        Returns:
+            int: Number of trades actually added.
+        """
+        if self.db_sqlite is not None:
+            return self.db_sqlite.add_stock_trades_bulk(trades)
+        else:
+            return 0
+
+    @contextmanager
+    def batch(self):
+        """
+        Run all writes of the enclosed block in one transaction (one commit instead of one per call).
+
+        Example:
+            >>> db = Db()
+            >>> with db.batch():
+            ...     db.add_stockname_ticker("Apple", "AAPL")
+            ...     db.add_stock_trades_bulk([("AAPL", 1.0, 150.0, datetime.date(2024, 1, 2))])
+            1
+        """
+        with self.db_sqlite.batch() if self.db_sqlite is not None else nullcontext():
+            yield self
 
     def sell_stock(self, stockname: str, earnings: float, sell_date: datetime.date) -> None:
         """
@@ -162,12 +195,20 @@ class Db:
         if self.db_sqlite is not None:
             self.db_sqlite.add_stockname_ticker(stockname, ticker_symbol, replace_existing)
 
-    def find_closed_trades(self) -> None:
+    def find_closed_trades(self, all_tickers: bool = False) -> int:
         """
         Find and close trade series where all shares have been sold, moving them to trade history.
+
+        Args:
+            all_tickers (bool): Check all tickers instead of only the ones whose trades changed since the last run.
+
+        Returns:
+            int: Number of closed trade series.
         """
         if self.db_sqlite is not None:
-            self.db_sqlite.find_closed_trades()
+            return self.db_sqlite.find_closed_trades(all_tickers)
+        else:
+            return 0
 
     def get_ticker_symbol(self, stockname: str) -> Optional[str]:
         """
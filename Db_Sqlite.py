@@ -1,6 +1,9 @@
+import time
 import sqlite3
 import datetime
-from typing import Any, Dict, List, Set, Optional
+import threading
+from typing import Any, Dict, Iterable, List, Set, Optional
+from contextlib import contextmanager
 
 import globals
 
@@ -23,66 +26,356 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 
 """ SQLite database handler for stock trades. """
 
+# Sekundärindizes, damit die häufigen Abfragen bei zehntausenden Trades nicht die ganze Tabelle lesen
+# Indizes von Migration 2. Unveränderlich, damit Version 2 für jede Datenbank dasselbe bedeutet;
+# neue Indizes kommen mit einer neuen Migration.
+INDEXES_V2 = (
+    # Abfragen über einen Ticker und seine aktive Serie, sortiert nach Datum; deckt Menge und Invest mit ab
+    ('idx_active_trades_ticker_active_date',
+     'active_trades (ticker_symbol, is_active_series, trade_date, quantity, invest)'),
+    # get_ticker_symbol und alle Abfragen mit "WHERE s.stockname = ?"
+    ('idx_stock_name_ticker_names_stockname', 'stock_name_ticker_names (stockname, ticker_symbol)'),
+    ('idx_trade_history_ticker', 'trade_history (ticker_symbol)'),
+)
+# ai_stock_analysis (ticker_symbol, analysis_date) ist bereits durch den Primärschlüssel indiziert
+
+CURRENT_STOCK_SET_QUERY = '''
+    SELECT s.stockname, a.quantity, a.invest, a.trade_date,
+           ai.chance, ai.chance_explanation, ai.risk, ai.risk_explanation
+    FROM active_trades a
+    JOIN stock_name_ticker_names s ON a.ticker_symbol = s.ticker_symbol
+    LEFT JOIN ai_stock_analysis ai ON ai.ticker_symbol = a.ticker_symbol
+        AND ai.analysis_date = (SELECT MAX(analysis_date) FROM ai_stock_analysis
+                                WHERE ticker_symbol = a.ticker_symbol)
+    WHERE a.is_active_series = 1;'''
+# Trades der geschlossenen Serien der Ticker in temp.closing_tickers: die laufende Stückzahl je Ticker
+# (nach Datum) erreicht 0 am letzten Trade einer Serie; "series" zählt die davor geschlossenen Serien
+CLOSED_TRADES_QUERY = '''
+    WITH positions AS (
+        SELECT trade_id, ticker_symbol, quantity, invest, trade_date,
+               ABS(SUM(quantity) OVER (PARTITION BY ticker_symbol ORDER BY trade_date, trade_id
+                                       ROWS UNBOUNDED PRECEDING)) < 0.0001 AS closes
+        FROM active_trades
+        WHERE is_active_series = 1 AND ticker_symbol IN (SELECT ticker_symbol FROM temp.closing_tickers)
+    ), numbered AS (
+        SELECT *,
+               COALESCE(SUM(closes) OVER (PARTITION BY ticker_symbol ORDER BY trade_date, trade_id
+                                          ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS series,
+               SUM(closes) OVER (PARTITION BY ticker_symbol) AS closed_series
+        FROM positions
+    )
+    SELECT trade_id, ticker_symbol, quantity, invest, trade_date, series
+    FROM numbered
+    WHERE series < closed_series;'''
+QUANTITY_OF_STOCK_QUERY = '''
+    SELECT SUM(a.quantity) as total_quantity
+    FROM active_trades a
+    JOIN stock_name_ticker_names s ON a.ticker_symbol = s.ticker_symbol
+    WHERE s.stockname = ? AND a.is_active_series = 1;'''
+TICKER_SYMBOL_QUERY = 'SELECT ticker_symbol FROM stock_name_ticker_names WHERE stockname = ?;'
+STOCK_NEWS_QUERY = '''
+    SELECT analysis_date, stock_news
+    FROM ai_stock_analysis
+    WHERE ticker_symbol = ?
+    ORDER BY analysis_date DESC
+    LIMIT ?;'''
+
+# Abfrage -> (SQL, Beispielparameter, Tabellen-Aliase, die vollständig gelesen werden dürfen)
+INDEXED_QUERIES = {
+    'get_current_stock_set': (CURRENT_STOCK_SET_QUERY, (), {'s'}),  # alle Namen, je Name Indexsuche
+    'find_closed_trades': (CLOSED_TRADES_QUERY, (), {'closing_tickers', 'positions', 'numbered'}),  # nur geänderte Ticker
+    'get_quantity_of_stock': (QUANTITY_OF_STOCK_QUERY, ('Stock 1',), set()),
+    'get_ticker_symbol': (TICKER_SYMBOL_QUERY, ('Stock 1',), set()),
+    'get_stock_news': (STOCK_NEWS_QUERY, ('TICK1', 3), set()),
+}
+
+
+def _create_base_tables(cursor: sqlite3.Cursor) -> None:
+    """Tables of the schema before versioning; IF NOT EXISTS, so also for databases created without user_version."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stock_name_ticker_names (
+            ticker_symbol TEXT PRIMARY KEY,
+            stockname TEXT NOT NULL);''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS active_trades (
+            trade_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker_symbol TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            invest REAL NOT NULL,
+            trade_date TEXT NOT NULL,
+            is_active_series INTEGER NOT NULL CHECK (is_active_series IN (0, 1)),
+            FOREIGN KEY (ticker_symbol) REFERENCES stock_name_ticker_names(ticker_symbol));''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dividend_payments (
+            ticker_symbol TEXT NOT NULL,
+            payment_date TEXT NOT NULL,
+            amount REAL NOT NULL,
+            PRIMARY KEY (ticker_symbol, payment_date),
+            FOREIGN KEY (ticker_symbol) REFERENCES stock_name_ticker_names(ticker_symbol)
+        );''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trade_history (
+            trade_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker_symbol TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            sum_buy REAL NOT NULL,
+            sum_sell REAL NOT NULL,
+            FOREIGN KEY (ticker_symbol) REFERENCES stock_name_ticker_names(ticker_symbol));''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS ai_stock_analysis (
+            ticker_symbol TEXT NOT NULL,
+            analysis_date TEXT NOT NULL,
+            chance INTEGER NOT NULL,
+            chance_explanation TEXT,
+            risk INTEGER NOT NULL,
+            risk_explanation TEXT,
+            stock_news TEXT,
+            PRIMARY KEY (ticker_symbol, analysis_date),
+            FOREIGN KEY (ticker_symbol) REFERENCES stock_name_ticker_names(ticker_symbol));''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS ai_diversification_analysis(
+            analysis_date TEXT PRIMARY KEY,
+            analysis_text TEXT NOT NULL);
+    ''')
+
+
+def _create_indexes(cursor: sqlite3.Cursor) -> None:
+    """Secondary indexes for the frequent queries (INDEXES_V2)."""
+    for name, columns in INDEXES_V2:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {columns};')
+
+
+def _add_trade_source_keys(cursor: sqlite3.Cursor) -> None:
+    """
+    Column source_key of active_trades: the statement row an imported trade comes from, unique if set.
+    Importing the same statement again skips its rows; trades with equal values from different rows
+    (e.g. two fills of the same size on one day) and manual trades (no key) are all kept.
+    Existing rows are not touched. Also drops the content based unique index of an earlier
+    development version of this step, which rejected such trades.
+    """
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(active_trades);')}
+    if 'source_key' not in columns:
+        cursor.execute('ALTER TABLE active_trades ADD COLUMN source_key TEXT;')
+    cursor.execute('DROP INDEX IF EXISTS idx_active_trades_unique_trade;')
+    cursor.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_active_trades_source_key
+                      ON active_trades (source_key) WHERE source_key IS NOT NULL;''')
+
+
+def _track_changed_tickers(cursor: sqlite3.Cursor) -> None:
+    """
+    Table of the tickers whose active trades changed since the last find_closed_trades, filled by triggers.
+    Starts with all tickers that have active trades, so the first run checks everything.
+    """
+    cursor.execute('''CREATE TABLE IF NOT EXISTS changed_tickers (
+                          ticker_symbol TEXT PRIMARY KEY) WITHOUT ROWID;''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS active_trades_inserted AFTER INSERT ON active_trades
+                      BEGIN
+                          INSERT OR IGNORE INTO changed_tickers (ticker_symbol) VALUES (NEW.ticker_symbol);
+                      END;''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS active_trades_updated
+                      AFTER UPDATE OF ticker_symbol, quantity, invest, trade_date ON active_trades
+                      BEGIN
+                          INSERT OR IGNORE INTO changed_tickers (ticker_symbol) VALUES (OLD.ticker_symbol);
+                          INSERT OR IGNORE INTO changed_tickers (ticker_symbol) VALUES (NEW.ticker_symbol);
+                      END;''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS active_trades_deleted AFTER DELETE ON active_trades
+                      BEGIN
+                          INSERT OR IGNORE INTO changed_tickers (ticker_symbol) VALUES (OLD.ticker_symbol);
+                      END;''')
+    cursor.execute('''INSERT OR IGNORE INTO changed_tickers (ticker_symbol)
+                      SELECT DISTINCT ticker_symbol FROM active_trades WHERE is_active_series = 1;''')
+
+
+# Geordnete Migrationen (Version, Beschreibung, Funktion), jede läuft genau einmal je Datenbank.
+# Neue Schemaänderungen werden nur hinten angehängt, bestehende Schritte nie geändert.
+MIGRATIONS = [
+    (1, "base tables", _create_base_tables),
+    (2, "secondary indexes", _create_indexes),
+    (3, "trade source keys", _add_trade_source_keys),
+    (4, "changed ticker tracking", _track_changed_tickers),
+    (5, "trade source keys for development databases", _add_trade_source_keys),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Einstellungen jeder Verbindung: WAL, damit Schreiber im Hintergrund Leser der GUI nicht blockieren
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode = WAL;',
+    'PRAGMA synchronous = NORMAL;',  # mit WAL sicher gegen Korruption, nur der letzte Commit kann bei Stromausfall fehlen
+    'PRAGMA foreign_keys = ON;',
+    'PRAGMA cache_size = -16000;',  # 16 MB Seiten-Cache
+    'PRAGMA mmap_size = 268435456;',  # 256 MB memory-mapped I/O
+    'PRAGMA temp_store = MEMORY;',
+)
+BUSY_TIMEOUT_SECONDS = 10.0
+
 
 class DbSqlite:
-    def __init__(self) -> None:
+    """
+    Every thread gets its own connection and cursor (self.connection and self.cursor), so the Tk thread
+    and the background threads (AI analysis, RSS, prefetch) can use the Db singleton at the same time.
+    """
+
+    def __init__(self, db_file: str | None = None) -> None:
         """
         Initialize the SQLite database connection and ensure all tables exist.
+
+        Args:
+            db_file (str, optional): Database file, defaults to globals.SQLITE_FILE.
         """
-        self.connection = sqlite3.connect(globals.SQLITE_FILE)
-        self.cursor = self.connection.cursor()
+        self.db_file = db_file or globals.SQLITE_FILE
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections: Dict[int, sqlite3.Connection] = {}  # Thread-ID -> Verbindung
         self.check_setup()
 
+    def _open_connection(self) -> sqlite3.Connection:
+        """
+        Open the connection of the calling thread and close the ones of finished threads.
+
+        Returns:
+            sqlite3.Connection: The new connection.
+        """
+        connection = sqlite3.connect(self.db_file, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            connection.execute(pragma)
+        # Ticker, die find_closed_trades prüft (je Verbindung)
+        connection.execute('CREATE TEMP TABLE IF NOT EXISTS closing_tickers (ticker_symbol TEXT PRIMARY KEY) WITHOUT ROWID;')
+        with self.lock:
+            alive = {thread.ident for thread in threading.enumerate()}
+            for ident in [ident for ident in self.connections if ident not in alive]:
+                self.connections.pop(ident).close()
+            previous = self.connections.get(threading.get_ident())
+            if previous is not None:  # Thread-ID eines beendeten Threads wurde wiederverwendet
+                previous.close()
+            self.connections[threading.get_ident()] = connection
+        return connection
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """The connection of the calling thread, opened on first use."""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = self._open_connection()
+            self.local.cursor = connection.cursor()
+        return connection
+
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        """The cursor of the calling thread."""
+        if getattr(self.local, 'connection', None) is None:
+            _ = self.connection
+        return self.local.cursor
+
+    def _commit(self) -> None:
+        """Commit, unless the calling thread is inside batch(), which commits once at its end."""
+        if not getattr(self.local, 'batch_depth', 0):
+            self.connection.commit()
+
+    @contextmanager
+    def batch(self):
+        """
+        Run all writes of the enclosed block in one transaction: commit at the end, roll back on an exception.
+        Blocks can be nested, only the outermost one commits.
+
+        Example:
+            >>> with db.batch():
+            ...     db.add_stockname_ticker("Apple", "AAPL", False)
+            ...     db.add_stock_trade("AAPL", 1.0, 150.0, datetime.date(2024, 1, 2))
+        """
+        _ = self.connection
+        self.local.batch_depth = getattr(self.local, 'batch_depth', 0) + 1
+        try:
+            yield self
+        except BaseException:
+            self.local.batch_depth -= 1
+            if not self.local.batch_depth:
+                self.connection.rollback()
+            raise
+        self.local.batch_depth -= 1
+        if not self.local.batch_depth:
+            self.connection.commit()
+
     def check_setup(self) -> None:
         """
-        Create all necessary tables if they do not exist and enable foreign keys.
+        Open the connection with CONNECTION_PRAGMAS (WAL, foreign keys, caches) and bring the schema
+        up to SCHEMA_VERSION.
         """
-        self.cursor.execute('''PRAGMA foreign_keys = ON;''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS stock_name_ticker_names (
-                ticker_symbol TEXT PRIMARY KEY,
-                stockname TEXT NOT NULL);''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS active_trades (
-                trade_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticker_symbol TEXT NOT NULL,
-                quantity REAL NOT NULL,
-                invest REAL NOT NULL,
-                trade_date TEXT NOT NULL,
-                is_active_series INTEGER NOT NULL CHECK (is_active_series IN (0, 1)),
-                FOREIGN KEY (ticker_symbol) REFERENCES stock_name_ticker_names(ticker_symbol));''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS dividend_payments (
-                ticker_symbol TEXT NOT NULL,
-                payment_date TEXT NOT NULL,
-                amount REAL NOT NULL,
-                PRIMARY KEY (ticker_symbol, payment_date),
-                FOREIGN KEY (ticker_symbol) REFERENCES stock_name_ticker_names(ticker_symbol)
-            );''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS trade_history (
-                trade_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticker_symbol TEXT NOT NULL,
-                start_date TEXT NOT NULL,
-                end_date TEXT NOT NULL,
-                sum_buy REAL NOT NULL,
-                sum_sell REAL NOT NULL,
-                FOREIGN KEY (ticker_symbol) REFERENCES stock_name_ticker_names(ticker_symbol));''')
-        self.cursor.execute('''CREATE TABLE IF NOT EXISTS ai_stock_analysis (
-                ticker_symbol TEXT NOT NULL,
-                analysis_date TEXT NOT NULL,
-                chance INTEGER NOT NULL,
-                chance_explanation TEXT,
-                risk INTEGER NOT NULL,
-                risk_explanation TEXT,
-                stock_news TEXT,
-                PRIMARY KEY (ticker_symbol, analysis_date),
-                FOREIGN KEY (ticker_symbol) REFERENCES stock_name_ticker_names(ticker_symbol));''')
-        self.cursor.execute('''CREATE TABLE IF NOT EXISTS ai_diversification_analysis(
-                analysis_date TEXT PRIMARY KEY,
-                analysis_text TEXT NOT NULL);
-        ''')
-        self.connection.commit()
+        self.applied_migrations = self.migrate()
+
+    def schema_version(self) -> int:
+        """
+        Returns:
+            int: The schema version stored in the database (PRAGMA user_version), 0 for a new database.
+        """
+        self.cursor.execute('PRAGMA user_version;')
+        return self.cursor.fetchone()[0]
+
+    def migrate(self, target: Optional[int] = None) -> Dict[int, float]:
+        """
+        Run all migrations between the stored schema version and target, in order.
+        Every migration runs in its own transaction together with the update of the version,
+        so a failing step leaves the database at the previous version.
+
+        Args:
+            target (int, optional): Version to migrate to, defaults to SCHEMA_VERSION.
+
+        Returns:
+            dict: Version -> duration in seconds of the migrations that were run.
+
+        Raises:
+            sqlite3.Error: If a migration fails (after rolling it back).
+        """
+        target = SCHEMA_VERSION if target is None else target
+        version = self.schema_version()
+        if version > SCHEMA_VERSION:
+            print(f"Warning: Database schema version {version} is newer than this program ({SCHEMA_VERSION})")
+        applied = {}
+        for migration_version, description, migration in MIGRATIONS:
+            if not version < migration_version <= target:
+                continue
+            start = time.perf_counter()
+            try:
+                self.cursor.execute('BEGIN;')
+                migration(self.cursor)
+                self.cursor.execute(f'PRAGMA user_version = {migration_version};')
+                self.connection.commit()
+            except sqlite3.Error as e:
+                self.connection.rollback()
+                print(f"Error: Database migration {migration_version} ({description}) failed: {e}")
+                raise
+            applied[migration_version] = time.perf_counter() - start
+        return applied
+
+    def query_plan(self, query: str, parameters: tuple = ()) -> List[str]:
+        """
+        Get the query plan SQLite chooses for a query.
+
+        Args:
+            query (str): The SQL statement.
+            parameters (tuple): Its parameters.
+
+        Returns:
+            list: The detail lines of EXPLAIN QUERY PLAN, e.g. "SEARCH a USING INDEX ...".
+        """
+        self.cursor.execute('EXPLAIN QUERY PLAN ' + query, parameters)
+        return [row[3] for row in self.cursor.fetchall()]
+
+    def check_query_plans(self) -> Dict[str, List[str]]:
+        """
+        Check that the queries in INDEXED_QUERIES are answered with indexes instead of full table scans.
+
+        Returns:
+            dict: Query name -> plan lines with a forbidden full table scan, empty if all plans are fine.
+        """
+        problems = {}
+        for name, (query, parameters, allowed_scans) in INDEXED_QUERIES.items():
+            # "SCAN x" liest die ganze Tabelle (oder den ganzen Index), "SEARCH x USING ..." nur Treffer;
+            # "SCAN (subquery-n)" liest nur ein Zwischenergebnis
+            scans = [line for line in self.query_plan(query, parameters)
+                     if line.startswith('SCAN ') and not line.startswith('SCAN (')
+                     and line.split()[1] not in allowed_scans]
+            if scans:
+                problems[name] = scans
+        return problems
 
     def get_stock_set(self) -> Set[str]:
         """
@@ -105,22 +398,7 @@ class DbSqlite:
         Returns:
             dict: Dictionary with stock name as key and a list of trade info dicts as value.
         """
-        self.cursor.execute('''
-            SELECT s.stockname, a.quantity, a.invest, a.trade_date,
-                   ai.chance, ai.chance_explanation, ai.risk, ai.risk_explanation
-            FROM active_trades a
-            JOIN stock_name_ticker_names s ON a.ticker_symbol = s.ticker_symbol
-            LEFT JOIN (
-                SELECT t1.*
-                FROM ai_stock_analysis t1
-                INNER JOIN (
-                    SELECT ticker_symbol, MAX(analysis_date) AS max_date
-                    FROM ai_stock_analysis
-                    GROUP BY ticker_symbol
-                ) t2 ON t1.ticker_symbol = t2.ticker_symbol AND t1.analysis_date = t2.max_date
-            ) ai ON a.ticker_symbol = ai.ticker_symbol
-            WHERE a.is_active_series = 1;
-        ''')
+        self.cursor.execute(CURRENT_STOCK_SET_QUERY)
         rows = self.cursor.fetchall()
         dataset = dict()
         for row in rows:
@@ -163,42 +441,55 @@ class DbSqlite:
         Returns:
             float or None: Total quantity or None if not found.
         """
-        self.cursor.execute('''
-            SELECT SUM(a.quantity) as total_quantity
-            FROM active_trades a
-            JOIN stock_name_ticker_names s ON a.ticker_symbol = s.ticker_symbol
-            WHERE s.stockname = ? AND a.is_active_series = 1;
-        ''', (stockname,))
+        self.cursor.execute(QUANTITY_OF_STOCK_QUERY, (stockname,))
         row = self.cursor.fetchone()
         if row and row[0] is not None:
             return row[0]
         else:
             return None
 
-    def add_stock_trade(self, ticker_symbol: str, quantity: float, invest: float, trade_date: datetime.date) -> None:
+    def add_stock_trade(self, ticker_symbol: str, quantity: float, invest: float, trade_date: datetime.date,
+                        source_key: str | None = None) -> None:
         """
-        Add a new stock trade to the active trades table if it does not already exist.
+        Add a new stock trade to the active trades table.
 
         Args:
             ticker_symbol (str): The ticker symbol.
             quantity (float): The quantity traded.
             invest (float): The invested amount.
             trade_date (datetime.date): The date of the trade.
+            source_key (str or None): Statement row of an imported trade; the trade is skipped if a trade
+                with this key exists. None for manual trades.
         """
-        # query duplicate trades
+        # nur Trades mit bereits importierter source_key überspringt der Index idx_active_trades_source_key
         self.cursor.execute('''
-            SELECT trade_id FROM active_trades
-            WHERE ticker_symbol = ? AND quantity = ? AND invest = ? AND trade_date = ?;'''
-                            , (ticker_symbol, quantity, invest, trade_date.isoformat()))
-        row = self.cursor.fetchone()
-        if row:
-            return  # duplicate trade, do nothing
-        # insert new trade
-        self.cursor.execute('''
-            INSERT INTO active_trades (ticker_symbol, quantity, invest, trade_date, is_active_series)
-            VALUES (?, ?, ?, ?, 1);
-        ''', (ticker_symbol, quantity, invest, trade_date.isoformat()))
-        self.connection.commit()
+            INSERT OR IGNORE INTO active_trades (ticker_symbol, quantity, invest, trade_date, is_active_series,
+                                                 source_key)
+            VALUES (?, ?, ?, ?, 1, ?);
+        ''', (ticker_symbol, quantity, invest, trade_date.isoformat(), source_key))
+        self._commit()
+
+    def add_stock_trades_bulk(self, trades: Iterable[tuple]) -> int:
+        """
+        Add many stock trades in one statement, skipping trades whose source_key was already imported.
+
+        Args:
+            trades: Iterable of (ticker_symbol, quantity, invest, trade_date) or
+                (ticker_symbol, quantity, invest, trade_date, source_key) tuples, trade_date as datetime.date.
+
+        Returns:
+            int: Number of trades actually added.
+        """
+        changes = self.connection.total_changes
+        self.cursor.executemany('''
+            INSERT OR IGNORE INTO active_trades (ticker_symbol, quantity, invest, trade_date, is_active_series,
+                                                 source_key)
+            VALUES (?, ?, ?, ?, 1, ?);
+        ''', ((trade[0], trade[1], trade[2], trade[3].isoformat(), trade[4] if len(trade) > 4 else None)
+              for trade in trades))
+        added = self.connection.total_changes - changes
+        self._commit()
+        return added
 
     def sell_stock(self, stockname: str, earnings: float, sell_date: datetime.date) -> None:
         """
@@ -233,7 +524,7 @@ class DbSqlite:
             SET is_active_series = 0
             WHERE ticker_symbol = ? AND is_active_series = 1;
             ''', (ticker_symbol,))
-        self.connection.commit()
+        self._commit()
 
     def add_dividend_payment(self, ticker_symbol: str, payment_date: datetime.date, amount: float) -> None:
         """
@@ -248,7 +539,7 @@ class DbSqlite:
             INSERT OR REPLACE INTO dividend_payments (ticker_symbol, payment_date, amount)
             VALUES (?, ?, ?);
         ''', (ticker_symbol, payment_date.isoformat(), amount))
-        self.connection.commit()
+        self._commit()
 
     def get_dividend_payments(self) -> List[Dict[str, Any]]:
         """
@@ -285,7 +576,7 @@ class DbSqlite:
             {command} INTO stock_name_ticker_names (ticker_symbol, stockname)
             VALUES (?, ?);
         ''', (ticker_symbol, stockname))
-        self.connection.commit()
+        self._commit()
 
     def get_ticker_symbol(self, stockname: str) -> Optional[str]:
         """
@@ -297,7 +588,7 @@ class DbSqlite:
         Returns:
             str or None: The ticker symbol or None if not found.
         """
-        self.cursor.execute('SELECT ticker_symbol FROM stock_name_ticker_names WHERE stockname = ?;', (stockname,))
+        self.cursor.execute(TICKER_SYMBOL_QUERY, (stockname,))
         row = self.cursor.fetchone()
         if row:
             return row[0]
@@ -332,64 +623,44 @@ class DbSqlite:
         rows = self.cursor.fetchall()
         return {row[0]: row[1] for row in rows}
 
-    def find_closed_trades(self) -> None:
+    def find_closed_trades(self, all_tickers: bool = False) -> int:
         """
         Find and close trade series where all shares have been sold, moving them to trade history.
-        """
+        Only tickers whose trades changed since the last run are checked (table changed_tickers);
+        all closures are applied in one transaction.
 
-        def close_trade_series(stockname, total_money_earned, total_money_spend, start_date, end_date):
-            self.cursor.execute('''update active_trades
-                set is_active_series = 0
-                where trade_id in (
-                    select a.trade_id
-                    from active_trades a
-                    join stock_name_ticker_names s on a.ticker_symbol = s.ticker_symbol
-                    where s.stockname = ? and a.is_active_series = 1
-                    order by a.trade_date asc
-                    limit (
-                        select count(*)
-                        from active_trades a2
-                        join stock_name_ticker_names s2 on a2.ticker_symbol = s2.ticker_symbol
-                        where s2.stockname = ? and a2.is_active_series = 1
-                    )
-                );''', (stockname, stockname))
-            self.cursor.execute('''
-                INSERT INTO trade_history (ticker_symbol, start_date, end_date, sum_buy, sum_sell)
-                VALUES (?, ?, ?, ?, ?);
-            ''', (self.get_ticker_symbol(stockname), start_date.isoformat(), end_date.isoformat(), total_money_spend,
-                  total_money_earned)
-                                )
+        Args:
+            all_tickers (bool): Check all tickers with active trades instead of only the changed ones.
 
-        for Stock in self.get_stock_set():
+        Returns:
+            int: Number of closed trade series.
+        """
+        with self.batch():
+            self.cursor.execute('DELETE FROM temp.closing_tickers;')
+            # als erste Schreiboperation der Transaktion, damit keine Änderung dazwischen verloren geht
+            self.cursor.execute('DELETE FROM changed_tickers RETURNING ticker_symbol;')
+            changed = self.cursor.fetchall()
+            if all_tickers:
+                self.cursor.execute('''INSERT INTO temp.closing_tickers (ticker_symbol)
+                                       SELECT DISTINCT ticker_symbol FROM active_trades
+                                       WHERE is_active_series = 1;''')
+            else:
+                self.cursor.executemany('INSERT INTO temp.closing_tickers (ticker_symbol) VALUES (?);', changed)
+            self.cursor.execute('DROP TABLE IF EXISTS temp.closed_trades;')
+            self.cursor.execute('CREATE TEMP TABLE closed_trades AS ' + CLOSED_TRADES_QUERY)
             self.cursor.execute('''
-                SELECT a.quantity, a.invest, a.trade_date
-                FROM active_trades a
-                JOIN stock_name_ticker_names s ON a.ticker_symbol = s.ticker_symbol
-                WHERE s.stockname = ? AND a.is_active_series = 1
-                ORDER BY a.trade_date ASC;
-            ''', (Stock,))
-            rows = self.cursor.fetchall()
-            total_quantity = 0.0
-            total_money_spend = 0.0
-            total_money_earnerd = 0.0
-            start_date = None
-            for row in rows:
-                if start_date is None:
-                    start_date = datetime.date.fromisoformat(row[2])
-                total_quantity += row[0]
-                if row[0] > 0:
-                    total_money_spend += row[1]
-                else:
-                    total_money_earnerd -= row[1]
-                if abs(total_quantity) < 0.0001:
-                    # all shares sold, move to history
-                    close_trade_series(Stock, total_money_earnerd, total_money_spend, start_date,
-                                       datetime.date.fromisoformat(row[2]))
-                    total_quantity = 0.0
-                    total_money_spend = 0.0
-                    total_money_earnerd = 0.0
-                    start_date = None
-        self.connection.commit()
+                INSERT INTO trade_history (ticker_symbol, start_date, end_date, sum_buy, sum_sell)
+                SELECT ticker_symbol, MIN(trade_date), MAX(trade_date),
+                       SUM(CASE WHEN quantity > 0 THEN invest ELSE 0 END),
+                       SUM(CASE WHEN quantity > 0 THEN 0 ELSE -invest END)
+                FROM temp.closed_trades
+                GROUP BY ticker_symbol, series
+                ORDER BY MAX(trade_date), ticker_symbol;''')
+            closed_series = self.cursor.rowcount
+            self.cursor.execute('''UPDATE active_trades SET is_active_series = 0
+                                   WHERE trade_id IN (SELECT trade_id FROM temp.closed_trades);''')
+            self.cursor.execute('DROP TABLE temp.closed_trades;')
+        return closed_series
 
     def add_new_analysis(self, analysis_dict: Dict[str, Dict[str, Any]]) -> None:
         """
@@ -409,7 +680,7 @@ class DbSqlite:
                   analysis_result_dict['risk'][0] if analysis_result_dict['risk'][0] is not None else -1,
                   analysis_result_dict['risk'][1],
                   analysis_result_dict['news']))
-        self.connection.commit()
+        self._commit()
 
     def get_stock_news(self, ticker_symbol: str, last=3) -> Optional[Dict[str, Any]]:
         """
@@ -423,13 +694,7 @@ class DbSqlite:
         """
         if not ticker_symbol:
             return None
-        self.cursor.execute('''
-            SELECT analysis_date, stock_news
-            FROM ai_stock_analysis
-            WHERE ticker_symbol = ?
-            ORDER BY analysis_date DESC
-            LIMIT ?;
-        ''', (ticker_symbol, last))
+        self.cursor.execute(STOCK_NEWS_QUERY, (ticker_symbol, last))
         rows = self.cursor.fetchall()
         if rows:
             return {row[0]: row[1] for row in rows}
@@ -447,7 +712,7 @@ class DbSqlite:
             INSERT OR REPLACE INTO ai_diversification_analysis (analysis_date, analysis_text)
             VALUES (?, ?);
         ''', (datetime.date.today().isoformat(), analysis_text))
-        self.connection.commit()
+        self._commit()
 
     def get_diversification_analysis(self) -> Optional[str]:
         """
@@ -470,9 +735,150 @@ class DbSqlite:
 
     def close(self) -> None:
         """
-        Close the database connection and cursor.
-        """
-        self.cursor.close()
-        self.connection.close()
-        self.connection = None
-        self.cursor = None
+        Close the database connections of all threads.
+        """
+        with self.lock:
+            for connection in self.connections.values():
+                connection.close()
+            self.connections.clear()
+        self.local = threading.local()
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import argparse
+    import tempfile
+
+    def fill_synthetic(cursor: sqlite3.Cursor, stocks: int, trades: int) -> None:
+        """Fill a database with reproducible synthetic stocks, trades (10 % active) and AI analyses."""
+        generator = random.Random(1)
+        cursor.executemany('INSERT INTO stock_name_ticker_names (ticker_symbol, stockname) VALUES (?, ?);',
+                           [(f"TICK{i}", f"Stock {i}") for i in range(stocks)])
+        cursor.executemany('''INSERT INTO active_trades (ticker_symbol, quantity, invest, trade_date, is_active_series)
+                              VALUES (?, ?, ?, ?, ?);''',
+                           [(f"TICK{generator.randrange(stocks)}", 1.0 + i, 100.0,
+                             (datetime.date(2000, 1, 1) + datetime.timedelta(days=generator.randrange(9000))).isoformat(),
+                             int(generator.random() < 0.1)) for i in range(trades)])
+        cursor.executemany('''INSERT OR IGNORE INTO ai_stock_analysis (ticker_symbol, analysis_date, chance, risk)
+                              VALUES (?, ?, 50, 50);''',
+                           [(f"TICK{i}", (datetime.date(2024, 1, 1) + datetime.timedelta(days=day)).isoformat())
+                            for i in range(stocks) for day in range(0, 365, 30)])
+
+    def synthetic_series(stocks: int, trades: int) -> List[tuple]:
+        """Reproducible trades forming series of buys followed by sells of the same quantity; the last series
+        of every ticker stays open."""
+        generator = random.Random(1)
+        result = []
+        day = {i: 0 for i in range(stocks)}
+        while len(result) < trades:
+            i = generator.randrange(stocks)
+            buys = [round(generator.uniform(1, 20), 4) for _ in range(generator.randint(1, 4))]
+            sells = [sum(buys) / 2, sum(buys) - sum(buys) / 2] if generator.random() < 0.5 else [sum(buys)]
+            for quantity, invest in [(q, 100.0 * q) for q in buys] + [(-q, -110.0 * q) for q in sells]:
+                day[i] += 1
+                result.append((f"TICK{i}", quantity, invest,
+                               datetime.date(2000, 1, 1) + datetime.timedelta(days=day[i])))
+        for i in range(stocks):
+            day[i] += 1
+            result.append((f"TICK{i}", 1.0, 100.0, datetime.date(2000, 1, 1) + datetime.timedelta(days=day[i])))
+        return result
+
+    parser = argparse.ArgumentParser(prog="python Db_Sqlite.py", description="Database checks on synthetic data.")
+    parser.add_argument("--trades", type=int, default=50000, help="number of synthetic trades (default 50000)")
+    parser.add_argument("--stocks", type=int, default=500, help="number of synthetic stocks (default 500)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("check-plans", help="Check that the frequent queries use indexes "
+                                              "(exit code 1 if one reads a whole table).")
+    subparsers.add_parser("benchmark-migrations", help="Measure the migrations from schema version 1 "
+                                                       "to the current version.")
+    subparsers.add_parser("benchmark-import", help="Compare importing trades one by one with "
+                                                   "add_stock_trades_bulk.")
+    subparsers.add_parser("benchmark-closing", help="Measure find_closed_trades on synthetic trade series, "
+                                                    "full and after a change of one ticker.")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, "synthetic.db")
+        if arguments.command == "check-plans":
+            db = DbSqlite(db_file)
+            fill_synthetic(db.cursor, arguments.stocks, arguments.trades)
+            db.connection.commit()
+            db.cursor.execute('ANALYZE;')
+            for name, (query, parameters, _) in INDEXED_QUERIES.items():
+                start = time.perf_counter()
+                db.cursor.execute(query, parameters).fetchall()
+                print(f"{name}: {(time.perf_counter() - start) * 1000:.2f} ms")
+                for line in db.query_plan(query, parameters):
+                    print(f"    {line}")
+            problems = db.check_query_plans()
+            db.close()
+            for name, lines in problems.items():
+                print(f"Error: {name} reads a whole table: {'; '.join(lines)}")
+            raise SystemExit(1 if problems else 0)
+
+        if arguments.command == "benchmark-migrations":
+            # Datenbank im Zustand von Version 1 anlegen, wie sie Nutzer ohne Versionierung haben
+            connection = sqlite3.connect(db_file)
+            _create_base_tables(connection.cursor())
+            fill_synthetic(connection.cursor(), arguments.stocks, arguments.trades)
+            connection.execute('PRAGMA user_version = 1;')
+            connection.commit()
+            connection.close()
+            print(f"Database with {arguments.trades} trades: {os.path.getsize(db_file) / 1e6:.1f} MB")
+            start = time.perf_counter()
+            db = DbSqlite(db_file)
+            total = time.perf_counter() - start
+            descriptions = {version: description for version, description, _ in MIGRATIONS}
+            for version, seconds in db.applied_migrations.items():
+                print(f"  migration {version} ({descriptions[version]}): {seconds * 1000:.1f} ms")
+            print(f"Opening and migrating to version {db.schema_version()}: {total * 1000:.1f} ms")
+            db.close()
+
+        if arguments.command == "benchmark-import":
+            generator = random.Random(1)
+            trades = [(f"TICK{generator.randrange(arguments.stocks)}", 1.0 + i, 100.0,
+                       datetime.date(2000, 1, 1) + datetime.timedelta(days=generator.randrange(9000)),
+                       f"synthetic:{i}")
+                      for i in range(arguments.trades)]
+            db = DbSqlite(db_file)
+            with db.batch():
+                for i in range(arguments.stocks):
+                    db.add_stockname_ticker(f"Stock {i}", f"TICK{i}", False)
+            single = trades[:min(len(trades), 2000)]  # einzeln mit je einem Commit, sonst dauert es zu lange
+            start = time.perf_counter()
+            for trade in single:
+                db.add_stock_trade(*trade)
+            seconds = time.perf_counter() - start
+            print(f"add_stock_trade: {len(single)} trades in {seconds:.2f} s "
+                  f"(extrapolated {seconds / len(single) * len(trades):.1f} s for {len(trades)})")
+            start = time.perf_counter()
+            with db.batch():
+                added = db.add_stock_trades_bulk(trades)
+            print(f"add_stock_trades_bulk: {len(trades)} trades ({added} new) in "
+                  f"{time.perf_counter() - start:.3f} s")
+            start = time.perf_counter()
+            added = db.add_stock_trades_bulk(trades)
+            print(f"add_stock_trades_bulk again (all duplicates, {added} new): {time.perf_counter() - start:.3f} s")
+            db.close()
+
+        if arguments.command == "benchmark-closing":
+            db = DbSqlite(db_file)
+            with db.batch():
+                for i in range(arguments.stocks):
+                    db.add_stockname_ticker(f"Stock {i}", f"TICK{i}", False)
+                trades = synthetic_series(arguments.stocks, arguments.trades)
+                db.add_stock_trades_bulk(trades)
+            start = time.perf_counter()
+            closed = db.find_closed_trades()
+            print(f"find_closed_trades, {len(trades)} trades of {arguments.stocks} tickers: "
+                  f"{closed} series closed in {time.perf_counter() - start:.3f} s")
+            db.add_stock_trade("TICK0", -1.0, -120.0, datetime.date(2100, 1, 1))
+            start = time.perf_counter()
+            closed = db.find_closed_trades()
+            print(f"find_closed_trades after a sale of one ticker: {closed} series closed in "
+                  f"{(time.perf_counter() - start) * 1000:.1f} ms")
+            start = time.perf_counter()
+            closed = db.find_closed_trades()
+            print(f"find_closed_trades without changes: {(time.perf_counter() - start) * 1000:.1f} ms")
+            db.close()
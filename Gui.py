@@ -6,6 +6,10 @@ import tkinter as tk
 
 import globals
 import Db
+import tools
+import stockdata
+import cache_warmup
+from quote_stream import QUOTE_STREAM, create_adapter
 
 from Gui_about_tab import AboutTab
 from Gui_settings_tab import SettingsTab
@@ -51,6 +55,7 @@ class BrokerApp:
         """Initialisiert die Hauptanwendung und erstellt alle Tabs und Widgets."""
         self.db = Db.Db()
         self.registered_update_functions = []
+        self.registered_live_update_functions = []
 
         self.Window = tk.Tk()
         self.Window.title(globals.APP_NAME)
@@ -78,10 +83,11 @@ class BrokerApp:
         self.tab_control.pack(expand=1, fill='both')
 
         # self.setup_tab_active_trades()
-        ActiveTradesTab(self.active_trades_tab, self.update_all_tabs, self.register_update_all_tabs)  # <--- NEU
+        ActiveTradesTab(self.active_trades_tab, self.update_all_tabs, self.register_update_all_tabs,
+                        self.register_live_update)
         DividendsTab(self.dividends_tab, self.register_update_all_tabs)
         TradeHistoryTab(self.trade_history_tab, self.register_update_all_tabs)
-        StockInfoTab(self.stock_info_tab, self.register_update_all_tabs)
+        StockInfoTab(self.stock_info_tab, self.register_update_all_tabs, self.register_live_update)
         StatisticsTab(self.statistics_tab, self.register_update_all_tabs)
         RssFeedsTab(self.rss_feeds_tab)
         ManualTradeTab(self.manual_trade_tab, self.update_all_tabs, self.register_update_all_tabs)
@@ -103,15 +109,66 @@ class BrokerApp:
         self.auto_update_job = None
         self.start_auto_update()
 
+        # Hintergrund-Threads reichen ihre Ereignisse über eine Queue an den Tk-Thread weiter
+        tools.GUI_QUEUE.start(self.Window)
+
+        # Redraw tabs when stale cache entries were refreshed in the background
+        self.cache_refresh_job = None
+        tools.add_refresh_listener(self.on_cache_refreshed)
+
+        # Intraday-Kurse der gehaltenen Aktien streamen, Day-Chart und aktuelle Werte live nachführen
+        self.live_update_job = None
+        QUOTE_STREAM.add_listener(stockdata.apply_quote_tick)
+        QUOTE_STREAM.add_listener(self.on_quote_tick)
+        adapter = create_adapter(globals.USER_CONFIG.get("QUOTE_STREAM", "poll"))
+        if adapter is not None:
+            QUOTE_STREAM.start(adapter, cache_warmup.get_held_tickers(self.db))
+
     def register_update_all_tabs(self, func):
         """Registriert eine Funktion, die aufgerufen wird, wenn alle Tabs aktualisiert werden sollen."""
         self.registered_update_functions.append(func)
 
+    def register_live_update(self, func):
+        """Registriert eine Funktion, die bei neuen gestreamten Kursen aufgerufen wird."""
+        self.registered_live_update_functions.append(func)
+
     def update_all_tabs(self):
         """Aktualisiert alle Tabs der Anwendung."""
         for update_function in self.registered_update_functions:
             update_function()
 
+    def on_cache_refreshed(self, func, args, kwargs, result):
+        """Wird aus einem Hintergrund-Thread aufgerufen, wenn ein veralteter Cache-Eintrag erneuert wurde."""
+        tools.GUI_QUEUE.post(self.schedule_cache_refresh_update)
+
+    def schedule_cache_refresh_update(self):
+        """Fasst mehrere Hintergrund-Aktualisierungen zu einem Neuzeichnen aller Tabs zusammen."""
+        if self.cache_refresh_job is None:
+            self.cache_refresh_job = self.Window.after(1000, self.perform_cache_refresh_update)
+
+    def perform_cache_refresh_update(self):
+        """Zeichnet alle Tabs mit den frisch geladenen Daten neu."""
+        self.cache_refresh_job = None
+        self.update_all_tabs()
+
+    def on_quote_tick(self, ticker_symbol, timestamp, price, volume, currency):
+        """Wird aus dem Thread des Kurs-Streams für jeden neuen Tick aufgerufen."""
+        tools.GUI_QUEUE.post(self.schedule_live_update)
+
+    def schedule_live_update(self):
+        """Fasst die Ticks einer Sekunde zu einer Live-Aktualisierung zusammen."""
+        if self.live_update_job is None:
+            self.live_update_job = self.Window.after(1000, self.perform_live_update)
+
+    def perform_live_update(self):
+        """Aktualisiert nur die Kurswerte und den Day-Chart, ohne die Tabs neu aufzubauen."""
+        self.live_update_job = None
+        for update_function in self.registered_live_update_functions:
+            try:
+                update_function()
+            except Exception as e:
+                print(f"Live update failed: {e}")
+
     def start_auto_update(self):
         """Startet das automatische Update für aktive Trades alle 5 Minuten."""
         # Schedule the first update
@@ -126,9 +183,9 @@ class BrokerApp:
     def perform_auto_update(self):
         """Führt das automatische Update der aktiven Trades durch."""
         try:
-            # Update the active trades tab
-            # self.update_tab_active_trades()
-            pass
+            # geänderte Bestände in den Kurs-Stream übernehmen und Werte nachführen
+            QUOTE_STREAM.subscribe(cache_warmup.get_held_tickers(self.db))
+            self.perform_live_update()
         except Exception as e:
             print(f"Auto-update failed: {e}")
         finally:
@@ -148,5 +205,6 @@ class BrokerApp:
         finally:
             # Clean up auto-update timer when application closes
             self.stop_auto_update()
+            QUOTE_STREAM.stop()
             globals.save_user_config()
             self.Window.quit()
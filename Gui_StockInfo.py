@@ -30,6 +30,8 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>. 
 """
 
+CHART_MAX_POINTS = 1500  # mehr Punkte kann der Chart ohnehin nicht darstellen
+
 
 def calculate_health(data: dict) -> float:
     """
@@ -102,16 +104,21 @@ class StockInfoTab:
     Shows stock charts, current day data, and placeholders for health check and peer compare.
     """
     
-    def __init__(self, parent: Any, register_update_all_tabs: Callable[[Callable[[], None]], None]) -> None:
+    def __init__(self, parent: Any, register_update_all_tabs: Callable[[Callable[[], None]], None],
+                 register_live_update: Callable[[Callable[[], None]], None] | None = None) -> None:
         """
         Initialize the StockInfoTab with all components.
 
         Args:
             parent: The parent tkinter widget.
             register_update_all_tabs: Function to register the update callback.
+            register_live_update: Function to register the callback for new streamed prices.
         """
         self.db = Db.Db()
+        self.peer_compare_request = 0
         register_update_all_tabs(self.update_tab_stock_info)
+        if register_live_update is not None:
+            register_live_update(self.update_live_chart)
         
         # Main container with grid layout
         self.main_frame = ttk.Frame(parent)
@@ -228,6 +235,7 @@ class StockInfoTab:
     def update_peer_compare(self) -> None:
         """
         Aktualisiert die Peer-Compare-Tabelle mit Sektor-Daten.
+        Die Daten werden in einem Hintergrund-Thread geholt, die Tabelle wird danach im Tk-Thread gefüllt.
         """
         # Treeview leeren
         for row in self.peer_compare_tree.get_children():
@@ -235,21 +243,58 @@ class StockInfoTab:
 
         stock_set_name = self.db.get_stock_set()
         stock_set_ticker = [self.db.get_ticker_symbol(name) for name in stock_set_name if self.db.get_ticker_symbol(name)]
-        sektor_report_data = sektor_report.sektor_report(stock_set_ticker)
-
         stock_name = self.combobox_stock_selection.get()
         stock_ticker = self.db.get_ticker_symbol(stock_name)
-        _, current_stock_sector = stockdata.get_industry_and_sector(stock_ticker)
 
+        # nur das Ergebnis der letzten Anfrage anzeigen
+        self.peer_compare_request += 1
+        request = self.peer_compare_request
+        tools.GUI_QUEUE.run_in_background(
+            lambda: self._get_peer_compare_rows(stock_set_ticker, stock_ticker),
+            lambda result: self._show_peer_compare(request, *result))
+
+    def _show_peer_compare(self, request: int, current_stock_sector: str | None, rows: list[dict]) -> None:
+        """
+        Füllt die Peer-Compare-Tabelle mit den im Hintergrund berechneten Zeilen (Tk-Thread).
+        """
+        if request != self.peer_compare_request:
+            return
         # Frame-Titel dynamisch setzen
         if current_stock_sector:
             self.frame_peer_compare.config(text=f"Peer Compare {current_stock_sector}")
         else:
             self.frame_peer_compare.config(text="Peer Compare")
+        for row in self.peer_compare_tree.get_children():
+            self.peer_compare_tree.delete(row)
+        for row in rows:
+            self.peer_compare_tree.insert(
+                "",
+                "end",
+                values=row["values"],
+                tags=row["tags"]
+            )
+
+        # Nachträglich die aktive Zeile selektieren (optional, falls gewünscht)
+        # for row in self.peer_compare_tree.get_children():
+        #     vals = self.peer_compare_tree.item(row, "values")
+        #     if vals and self.db.get_ticker_symbol(vals[0]) == stock_ticker:
+        #         self.peer_compare_tree.selection_set(row)
+        #         break
+
+    def _get_peer_compare_rows(self, stock_set_ticker: list[str], stock_ticker: str) -> tuple:
+        """
+        Holt die Sektor-Daten und berechnet die Zeilen der Peer-Compare-Tabelle.
+        Läuft im Hintergrund-Thread und darf keine Tk-Widgets benutzen.
+
+        Returns:
+            tuple: (Sektor der gewählten Aktie oder None, Zeilen sortiert nach Health)
+        """
+        sektor_report_data = sektor_report.sektor_report(stock_set_ticker)
+        _, current_stock_sector = stockdata.get_industry_and_sector(stock_ticker)
 
         if not current_stock_sector or current_stock_sector not in sektor_report_data.keys():
             # Keine Daten für diesen Sektor
-            return
+            return current_stock_sector, []
 
         rows = []
         # Für jeden Peer im Sektor: Zeile einfügen
@@ -316,21 +361,7 @@ class StockInfoTab:
             })
         # Sortieren nach Health absteigend
         rows.sort(key=lambda r: r["health"], reverse=True)
-        # Einfügen
-        for row in rows:
-            self.peer_compare_tree.insert(
-                "",
-                "end",
-                values=row["values"],
-                tags=row["tags"]
-            )
-
-        # Nachträglich die aktive Zeile selektieren (optional, falls gewünscht)
-        # for row in self.peer_compare_tree.get_children():
-        #     vals = self.peer_compare_tree.item(row, "values")
-        #     if vals and self.db.get_ticker_symbol(vals[0]) == stock_ticker:
-        #         self.peer_compare_tree.selection_set(row)
-        #         break
+        return current_stock_sector, rows
 
     def update_tab_stock_info(self) -> None:
         """
@@ -397,6 +428,18 @@ class StockInfoTab:
             if ticker_symbol:
                 self.update_chart(ticker_symbol)
     
+    def update_live_chart(self) -> None:
+        """
+        Redraw the Day chart with the newly streamed ticks; the stored intraday bars are served as they are
+        and extended in the background (see HistoryStore.get_history).
+        """
+        if self.combobox_timespan_selection.get() != "Day":
+            return
+        selected_stock = self.combobox_stock_selection.get()
+        ticker_symbol = self.db.get_ticker_symbol(selected_stock) if selected_stock else None
+        if ticker_symbol:
+            self.update_chart(ticker_symbol)
+
     def update_chart(self, ticker_symbol: str) -> None:
         """
         Update the matplotlib chart with stock data based on selected timespan.
@@ -413,25 +456,23 @@ class StockInfoTab:
             title_suffix = ""
             
             if timespan == "All":
-                data = stockdata.get_stock_all_data(ticker_symbol)
                 title_suffix = "All Available Data"
             elif timespan == "Year":
-                data = stockdata.get_stock_year_data(ticker_symbol)
                 title_suffix = "Last Year"
             elif timespan == "Month":
-                data = stockdata.get_stock_month_data(ticker_symbol)
                 title_suffix = "Last Month"
             elif timespan == "Day":
-                data = stockdata.get_stock_day_chart_data(ticker_symbol)
                 title_suffix = "Today (Intraday)"
             else:
                 # Default to year if something goes wrong
-                data = stockdata.get_stock_year_data(ticker_symbol)
+                timespan = "Year"
                 title_suffix = "Last Year"
+            # alle Zeiträume sind Ausschnitte derselben lokalen Historie, lange Zeiträume werden ausgedünnt
+            data = stockdata.get_stock_history(ticker_symbol, timespan, max_points=CHART_MAX_POINTS)
             
             self.ax.clear()
             
-            if data and data.get('dates') and data.get('prices'):
+            if data and len(data.get('dates', [])) and len(data.get('prices', [])):
                 dates = data['dates']
                 prices = data['prices']
                 
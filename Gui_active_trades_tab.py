@@ -21,7 +21,8 @@ class ActiveTradesTab:
         self,
         parent: tk.Widget,
         update_all_tabs_callback: Callable[[], None],
-        register_update_all_tabs: Callable[[Callable[[], None]], None]
+        register_update_all_tabs: Callable[[Callable[[], None]], None],
+        register_live_update: Callable[[Callable[[], None]], None] | None = None
     ) -> None:
         """
         Initialize the ActiveTradesTab.
@@ -30,10 +31,14 @@ class ActiveTradesTab:
             parent: The parent tkinter widget.
             update_all_tabs_callback: Callback to update all tabs.
             register_update_all_tabs: Function to register the update callback.
+            register_live_update: Function to register the callback for new streamed prices.
         """
         self.db = Db.Db()
         self.update_all_tabs = update_all_tabs_callback
         register_update_all_tabs(self.update_tab_active_trades)
+        if register_live_update is not None:
+            register_live_update(self.update_live_values)
+        self.live_rows = []  # (Treeview-Item, Ticker, Stückzahl, Invest, Summenzeile)
 
         parent.sort = "name"
         parent.columnconfigure(0, weight=1)
@@ -95,6 +100,8 @@ class ActiveTradesTab:
                 stock_summary[trade]['risk'] = data['risk'] if data['risk'] is not None else ''
                 stock_summary[trade]['chance_explanation'] = str(data['chance_explanation']) if data['chance_explanation'] is not None else ''
                 stock_summary[trade]['risk_explanation'] = str(data['risk_explanation']) if data['risk_explanation'] is not None else ''
+        ticker_symbols = {stockname: self.db.get_ticker_symbol(stockname) for stockname in portfolio_stock_names}
+        prices = stockdata.get_stock_prices(list(ticker_symbols.values()))  # ein Request für alle Kurse
         sort_key = self.treeview.master.sort
         if sort_key == "name":
             portfolio_stock_names = sorted(portfolio_stock_names)
@@ -119,7 +126,7 @@ class ActiveTradesTab:
         elif sort_key == "now":
             now_values = {}
             for stockname in portfolio_stock_names:
-                current_price, currency, rate = stockdata.get_stock_price(self.db.get_ticker_symbol(stockname))
+                current_price, currency, rate = prices[ticker_symbols[stockname]]
                 if current_price is not None and rate is not None:
                     now_values[stockname] = stock_summary[stockname]['quantity'] * current_price * rate
                 elif current_price is not None:
@@ -132,7 +139,7 @@ class ActiveTradesTab:
         elif sort_key == "profit":
             profit_values = {}
             for stockname in portfolio_stock_names:
-                current_price, currency, rate = stockdata.get_stock_price(self.db.get_ticker_symbol(stockname))
+                current_price, currency, rate = prices[ticker_symbols[stockname]]
                 invest = stock_summary[stockname]['invest']
                 if current_price is not None and rate is not None:
                     now = stock_summary[stockname]['quantity'] * current_price * rate
@@ -147,30 +154,11 @@ class ActiveTradesTab:
                                            key=lambda name: profit_values[name],
                                            reverse=True)
 
+        self.live_rows.clear()
         for stockname in portfolio_stock_names:
-            current_price, currency, rate = stockdata.get_stock_price(self.db.get_ticker_symbol(stockname))
-            if current_price is not None and rate is not None:
-                euro = stock_summary[stockname]['quantity'] * current_price * rate
-                current_value = f"{euro:.2f} EUR ({stock_summary[stockname]['quantity'] * current_price:.2f} {currency})"
-                earnings_eur = (euro - stock_summary[stockname]['invest'])
-                profit_text = f"{earnings_eur:.2f} EUR ({earnings_eur / stock_summary[stockname]['invest'] * 100:.2f} %)"
-            elif current_price is not None:
-                euro = stock_summary[stockname]['quantity'] * current_price
-                current_value = f"{euro:.2f} {currency}"
-                earnings_eur = (euro - stock_summary[stockname]['invest'])
-                profit_text = f"{earnings_eur:.2f} {currency} ({earnings_eur / stock_summary[stockname]['invest'] * 100:.2f} %)"
-            else:
-                current_value = ""
-                earnings_eur = None
-                profit_text = ""
-
-            tag = 'neutral'
-            if earnings_eur is not None:
-                if earnings_eur > globals.PROFIT_THRESHOLD:
-                    tag = 'profit_positive'
-                elif earnings_eur < -globals.PROFIT_THRESHOLD:
-                    tag = 'profit_negative'
-
+            current_value, profit_text, tag = self._value_texts(stock_summary[stockname]['quantity'],
+                                                                stock_summary[stockname]['invest'],
+                                                                prices[ticker_symbols[stockname]])
             stock_summary[stockname]['id'] = self.treeview.insert('',
                                                                   "end",
                                                                   values=(stockname,
@@ -183,29 +171,14 @@ class ActiveTradesTab:
                                                                           )
                                                                   )
             self.treeview.item(stock_summary[stockname]['id'], tags=(tag,))
+            self.live_rows.append((stock_summary[stockname]['id'], ticker_symbols[stockname],
+                                   stock_summary[stockname]['quantity'], stock_summary[stockname]['invest'], True))
 
         for trade, data_array in trades.items():
             sorted_data_array = sorted(data_array, key=lambda d: d['date'], reverse=True)
-            current_stock_price, currency, rate = stockdata.get_stock_price(self.db.get_ticker_symbol(trade))
             for data in sorted_data_array:
-                if current_stock_price is not None and rate is not None:
-                    current_price = data['quantity'] * current_stock_price * rate
-                    current_value = f"{current_price:.2f} EUR ({data['quantity'] * current_stock_price:.2f} {currency})"
-                    earnings_eur = (current_price - data['invest'])
-                elif current_stock_price is not None:
-                    current_price = data['quantity'] * current_stock_price
-                    current_value = f"{current_price:.2f} {currency}"
-                    earnings_eur = (current_price - data['invest'])
-                else:
-                    current_value = ""
-                    earnings_eur = None
-
-                tag = 'neutral'
-                if earnings_eur is not None:
-                    if earnings_eur > globals.PROFIT_THRESHOLD:
-                        tag = 'profit_positive'
-                    elif earnings_eur < -globals.PROFIT_THRESHOLD:
-                        tag = 'profit_negative'
+                current_value, _, tag = self._value_texts(data['quantity'], data['invest'],
+                                                          prices[ticker_symbols[trade]])
 
                 my_id = self.treeview.insert(stock_summary[trade]['id'],
                                              "end",
@@ -217,6 +190,59 @@ class ActiveTradesTab:
                                                      )
                                              )
                 self.treeview.item(my_id, tags=(tag,))
+                self.live_rows.append((my_id, ticker_symbols[trade], data['quantity'], data['invest'], False))
+
+    @staticmethod
+    def _value_texts(quantity: float, invest: float, price: tuple) -> tuple[str, str, str]:
+        """
+        Format the current value and the profit of a position.
+
+        Args:
+            quantity: Number of shares.
+            invest: Invested amount in EUR.
+            price: (current_price, currency, rate) as returned by stockdata.get_stock_price.
+
+        Returns:
+            tuple: (current value text, profit text, treeview tag).
+        """
+        current_price, currency, rate = price
+        if current_price is not None and rate is not None:
+            euro = quantity * current_price * rate
+            current_value = f"{euro:.2f} EUR ({quantity * current_price:.2f} {currency})"
+            earnings_eur = (euro - invest)
+            profit_text = f"{earnings_eur:.2f} EUR" + (f" ({earnings_eur / invest * 100:.2f} %)" if invest else "")
+        elif current_price is not None:
+            euro = quantity * current_price
+            current_value = f"{euro:.2f} {currency}"
+            earnings_eur = (euro - invest)
+            profit_text = f"{earnings_eur:.2f} {currency}" + (f" ({earnings_eur / invest * 100:.2f} %)" if invest else "")
+        else:
+            current_value = ""
+            earnings_eur = None
+            profit_text = ""
+
+        tag = 'neutral'
+        if earnings_eur is not None:
+            if earnings_eur > globals.PROFIT_THRESHOLD:
+                tag = 'profit_positive'
+            elif earnings_eur < -globals.PROFIT_THRESHOLD:
+                tag = 'profit_negative'
+        return current_value, profit_text, tag
+
+    def update_live_values(self) -> None:
+        """
+        Updates only the Now and Profit cells of the existing rows with the latest (streamed) prices,
+        keeping sorting, expanded rows and selection.
+        """
+        prices = stockdata.get_stock_prices([row[1] for row in self.live_rows])
+        for item_id, ticker_symbol, quantity, invest, summary in self.live_rows:
+            if not self.treeview.exists(item_id):
+                continue
+            current_value, profit_text, tag = self._value_texts(quantity, invest, prices[ticker_symbol])
+            self.treeview.set(item_id, "Now", current_value)
+            if summary:
+                self.treeview.set(item_id, "Profit", profit_text)
+            self.treeview.item(item_id, tags=(tag,))
 
     def update_ai_analysis(self) -> None:
         """
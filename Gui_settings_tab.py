@@ -101,6 +101,24 @@ class SettingsTab:
                                                     "https://platform.openai.com/account/api-keys"))
         self.button_openai_website.grid(column=3, row=1, padx=10, pady=10)
 
+        self.frame_cache_statistics = ttk.LabelFrame(parent, text="Cache Statistics")
+        self.frame_cache_statistics.grid(column=0, row=3, padx=10, pady=10, sticky="nsew")
+        self.treeview_cache_statistics = ttk.Treeview(
+            self.frame_cache_statistics,
+            columns=("Function", "TTL", "Hit %", "Hits", "Stale", "Misses", "Entries", "Disk", "Latency", "p95"),
+            show='headings',
+            height=8
+        )
+        for column, width in (("Function", 260), ("TTL", 70), ("Hit %", 60), ("Hits", 60), ("Stale", 60),
+                              ("Misses", 60), ("Entries", 60), ("Disk", 80), ("Latency", 70), ("p95", 70)):
+            self.treeview_cache_statistics.heading(column, text=column)
+            self.treeview_cache_statistics.column(column, width=width, stretch=column == "Function",
+                                                  anchor="w" if column == "Function" else "e")
+        self.treeview_cache_statistics.grid(column=0, row=0, padx=10, pady=10, sticky="nsew")
+        self.button_refresh_cache_statistics = ttk.Button(self.frame_cache_statistics, text="Refresh",
+                                                          command=self.update_cache_statistics)
+        self.button_refresh_cache_statistics.grid(column=1, row=0, padx=10, pady=10, sticky="n")
+
         # Initiales Update
         self.update_tab_settings()
 
@@ -113,6 +131,35 @@ class SettingsTab:
         stocknames_with_tickers = self.db.get_stocknames_with_tickers()
         self.setup_combobox_stockname_symbol_matching['values'] = sorted(stocknames_with_tickers.values())
         self.setup_combobox_stockname_ticker_matching['values'] = sorted(stocknames_with_tickers.keys())
+        self.update_cache_statistics()
+
+    def update_cache_statistics(self) -> None:
+        """
+        Shows hit ratio, size and upstream latency of all caches (accumulated over all sessions).
+        The report opens every cache store, so it is collected in a background thread.
+        """
+        tools.GUI_QUEUE.run_in_background(tools.cache_stats_report, self.show_cache_statistics)
+
+    def show_cache_statistics(self, report: list[dict]) -> None:
+        """
+        Fills the cache statistics table (Tk thread).
+
+        Args:
+            report (list[dict]): Result of tools.cache_stats_report().
+        """
+        self.treeview_cache_statistics.delete(*self.treeview_cache_statistics.get_children())
+        for data in report:
+            self.treeview_cache_statistics.insert('', "end", values=(
+                data['name'],
+                f"{data['ttl_seconds']} s" if data['ttl_seconds'] is not None else "∞",
+                f"{data['hit_ratio'] * 100:.1f}" if data['hit_ratio'] is not None else "",
+                data['hits'],
+                data['stale'],
+                data['misses'],
+                data['entries'],
+                tools.format_bytes(data['disk_bytes'] if data['disk_bytes'] is not None else data['memory_bytes']),
+                tools.format_seconds(data['latency_mean']),
+                tools.format_seconds(data['latency_p95'])))
 
     def store_long_name(self) -> None:
         """
@@ -9,6 +9,8 @@ import datetime
 
 import globals
 import stockdata
+import tools
+from fetch_engine import ENGINE
 import Db
 import threading
 import ai_diversification_report
@@ -99,6 +101,7 @@ class StatisticsTab:
         # disable editing
         self.info_diversification.config(state=tk.DISABLED)
 
+        self.pie_chart_request = 0
         self.update_tab_statistics()
 
     def insert_diversification_text_with_links(self, text: str) -> None:
@@ -135,6 +138,7 @@ class StatisticsTab:
     def _get_sectors_and_industries_invest(self, shorten: bool = True) -> dict:
         """
         Helper function to get the total investment per sector and industry.
+        Waits for the sector of every stock, so the GUI calls it in a background thread.
 
         Returns:
             dict: A dictionary with sectors and industries as keys and their total investment as values.
@@ -142,10 +146,15 @@ class StatisticsTab:
         current_stocks = self.db.get_current_stock_set()
         sector_invest_eur = {}
         industry_invest_eur = {}
+        ticker_symbols = {stockname: self.db.get_ticker_symbol(stockname) for stockname in current_stocks}
+        prices = stockdata.get_stock_prices(list(ticker_symbols.values()))
+        sector_futures = {ticker_symbol: ENGINE.submit(stockdata.get_industry_and_sector, ticker_symbol)
+                          for ticker_symbol in set(ticker_symbols.values())}
+        industries_and_sectors = {ticker_symbol: future.result() for ticker_symbol, future in sector_futures.items()}
         for stockname, data_array in current_stocks.items():
-            ticker_symbol = self.db.get_ticker_symbol(stockname)
-            current_price, currency, rate = stockdata.get_stock_price(ticker_symbol)
-            (industry, sector) = stockdata.get_industry_and_sector(ticker_symbol)
+            ticker_symbol = ticker_symbols[stockname]
+            current_price, currency, rate = prices[ticker_symbol]
+            (industry, sector) = industries_and_sectors[ticker_symbol]
             if shorten:
                 industry = industry.replace(' - ', '\n').replace(' & ', '\n').replace(' ', '\n') if industry is not None else None
                 sector = sector.replace(' - ', '\n').replace(' & ', '\n').replace(' ', '\n') if sector is not None else None
@@ -188,9 +197,11 @@ class StatisticsTab:
         stocks = set()
         total_invest = 0.0
         total_current_value = 0.0
+        ticker_symbols = {stockname: self.db.get_ticker_symbol(stockname) for stockname in current_stocks}
+        prices = stockdata.get_stock_prices(list(ticker_symbols.values()))
         for stockname, data_array in current_stocks.items():
             stocks.add(stockname)
-            current_price, currency, rate = stockdata.get_stock_price(self.db.get_ticker_symbol(stockname))
+            current_price, currency, rate = prices[ticker_symbols[stockname]]
             for data in data_array:
                 total_invest += data['invest']
                 if current_price is not None and rate is not None:
@@ -249,8 +260,22 @@ class StatisticsTab:
         self.label_dividends_avg_this_year.config(text=f"Relative Dividends this Year: {profit_percent_this_year:.2f} %")
 
 
-        # Pie Chart
-        sectors_and_industries = self._get_sectors_and_industries_invest()
+        # Pie Chart: Sektoren im Hintergrund holen, gezeichnet wird im Tk-Thread
+        self.pie_chart_request += 1
+        request = self.pie_chart_request
+        tools.GUI_QUEUE.run_in_background(self._get_sectors_and_industries_invest,
+                                          lambda result: self.update_pie_charts(request, result))
+
+    def update_pie_charts(self, request: int, sectors_and_industries: dict) -> None:
+        """
+        Draws the portfolio distribution per industry and sector.
+
+        Args:
+            request (int): Number of the update that fetched the data, older results are dropped.
+            sectors_and_industries (dict): Result of _get_sectors_and_industries_invest.
+        """
+        if request != self.pie_chart_request:
+            return
         value_sector_eur = sectors_and_industries['sector']
         value_industry_eur = sectors_and_industries['industry']
         # mixed sorting 1st biggest value, 2nd smallest value, 3th 2nd biggest value, 4th 2nd smallest value, ...
@@ -324,10 +349,11 @@ class StatisticsTab:
         The result is displayed in the info_diversification text widget.
         """
 
-        def run_diversification_thread(sectors_and_industries):
+        def run_diversification_thread():
             try:
                 self.button_call_ai_plan.config(state=tk.DISABLED)
                 self.button_call_ai_plan.config(text="🧠💭💭💭💭")
+                sectors_and_industries = self._get_sectors_and_industries_invest(shorten=False)
                 ai_text = ai_diversification_report.get_Report(sectors_and_industries)
                 self.info_diversification.after(0, lambda: handle_ai_text(ai_text))
             except Exception as e:
@@ -346,5 +372,4 @@ class StatisticsTab:
             self.button_call_ai_plan.config(state=tk.NORMAL)
             self.button_call_ai_plan.config(text="🧠Diversification Plan")
 
-        sectors_and_industries = self._get_sectors_and_industries_invest(shorten=False)
-        threading.Thread(target=run_diversification_thread, args=(sectors_and_industries,), daemon=True).start()
+        threading.Thread(target=run_diversification_thread, daemon=True).start()
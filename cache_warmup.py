@@ -0,0 +1,98 @@
+import time
+import threading
+from concurrent.futures import as_completed
+
+import Db
+import stockdata
+from fetch_engine import ENGINE, PRIORITY_PREFETCH, priority
+
+"""
+This file is part of "The Portfolio".
+
+"The Portfolio"is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+"The Portfolio" is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Prefetches the stockdata caches for the held portfolio, so the first render of the tabs
+is served from the caches instead of one network round trip per ticker.
+"""
+
+# Functions the tabs call on their first render, all with the ticker symbol as only argument.
+# The prices are fetched with one bulk request by warm_cache itself.
+WARM_UP_FUNCTIONS = (
+    stockdata.get_industry_and_sector,
+    stockdata.get_stock_day_data,
+    stockdata.get_stock_year_data,
+)
+
+
+def get_held_tickers(db: Db.Db | None = None) -> list[str]:
+    """
+    Get the ticker symbols of all stocks with active trades.
+
+    Args:
+        db (Db.Db, optional): Database facade, defaults to the Db singleton.
+
+    Returns:
+        list[str]: Sorted ticker symbols.
+    """
+    db = db or Db.Db()
+    stock_set = db.get_stock_set()
+    return sorted(ticker for ticker, stockname in db.get_stocknames_with_tickers().items()
+                  if stockname in stock_set)
+
+
+def warm_cache(tickers: list[str], functions=WARM_UP_FUNCTIONS) -> dict:
+    """
+    Fill the price cache with one bulk request and the caches of the given functions
+    for all tickers in parallel on the fetch engine (within its per-host limits).
+    Calls the GUI makes at the same time join the running fetch instead of starting a second one.
+
+    Args:
+        tickers (list[str]): Ticker symbols to prefetch.
+        functions: Cached functions taking the ticker symbol as only argument.
+
+    Returns:
+        dict: {'tickers': int, 'calls': int, 'errors': int, 'seconds': float}
+    """
+    start = time.perf_counter()
+    errors = 0
+    with priority(PRIORITY_PREFETCH):  # Anfragen der sichtbaren Tabs gehen vor
+        futures = {ENGINE.submit(stockdata.get_stock_prices, tickers): ('get_stock_prices', len(tickers))}
+        futures.update({ENGINE.submit(func, ticker): (func.__name__, ticker)
+                        for ticker in tickers for func in functions})
+    for future in as_completed(futures):
+        try:
+            future.result()
+        except Exception as e:
+            errors += 1
+            name, ticker = futures[future]
+            print(f"Error warming up {name}({ticker}): {e}")
+    return {'tickers': len(tickers), 'calls': len(futures), 'errors': errors,
+            'seconds': time.perf_counter() - start}
+
+
+def start_background_warm_up(tickers: list[str]) -> threading.Thread:
+    """
+    Run warm_cache in a daemon thread, e.g. while the GUI is being built.
+
+    Args:
+        tickers (list[str]): Ticker symbols to prefetch.
+
+    Returns:
+        threading.Thread: The started thread.
+    """
+    thread = threading.Thread(target=warm_cache, args=(tickers,), name="cache-warmup", daemon=True)
+    thread.start()
+    return thread
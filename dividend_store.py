@@ -0,0 +1,180 @@
+import os
+import time
+import sqlite3
+import threading
+
+import pandas as pd
+
+import tools
+import market_data
+
+"""
+This file is part of "The Portfolio".
+
+"The Portfolio"is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+"The Portfolio" is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Raw dividend events (ex-date and amount) of all tickers in a SQLite table.
+After the first full download only the events since the last known ex-date are requested.
+"""
+
+
+def dividend_rows(ticker_symbol: str, dividends: pd.Series) -> list:
+    """
+    Convert downloaded dividends into rows for the dividend_events table.
+    An empty download (no new events, e.g. on a weekend) gives no rows, whatever its index type.
+
+    Args:
+        ticker_symbol (str): The stock ticker symbol.
+        dividends (pd.Series): Amounts indexed by ex-date.
+
+    Returns:
+        list: (ticker_symbol, ex_date, amount) tuples.
+
+    >>> dividend_rows('KO', pd.Series([0.485], index=pd.DatetimeIndex(['2024-11-29'])))
+    [('KO', '2024-11-29', 0.485)]
+    >>> dividend_rows('KO', pd.Series(dtype=float))
+    []
+    >>> dividend_rows('KO', pd.Series(dtype=float, index=pd.DatetimeIndex([])))
+    []
+    """
+    if dividends.empty:
+        return []
+    return list(zip([ticker_symbol] * len(dividends), pd.DatetimeIndex(dividends.index).strftime('%Y-%m-%d'),
+                    dividends.to_numpy(dtype=float).tolist()))
+
+
+class DividendStore:
+    """
+    Dividend events per ticker in the tables dividend_events and dividend_checks (time of the
+    last check per ticker). A ticker is checked for new events at most once per refresh_seconds.
+    """
+
+    def __init__(self, db_file: str = "dividend_events.sqlite", refresh_seconds: int = 86400) -> None:
+        """
+        Args:
+            db_file (str): The SQLite file.
+            refresh_seconds (int): Minimum time between two checks for new events of a ticker.
+        """
+        self.db_file = db_file
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.RLock()
+        self.connection: sqlite3.Connection | None = None
+        self.flights = tools.SingleFlight()
+
+    def _ensure_open(self) -> sqlite3.Connection:
+        if self.connection is not None:
+            return self.connection
+        with self.lock:
+            if self.connection is None:
+                connection = sqlite3.connect(self.db_file, check_same_thread=False)
+                connection.execute('PRAGMA journal_mode = WAL;')
+                connection.execute('''
+                    CREATE TABLE IF NOT EXISTS dividend_events (
+                        ticker_symbol TEXT NOT NULL,
+                        ex_date TEXT NOT NULL,
+                        amount REAL NOT NULL,
+                        PRIMARY KEY (ticker_symbol, ex_date)) WITHOUT ROWID;''')
+                connection.execute('''
+                    CREATE TABLE IF NOT EXISTS dividend_checks (
+                        ticker_symbol TEXT PRIMARY KEY,
+                        checked REAL NOT NULL);''')
+                connection.commit()
+                self.connection = connection
+        return self.connection
+
+    def get_events(self, ticker_symbol: str) -> pd.Series:
+        """
+        Get all dividend events of a ticker, checking for new ones first if the last check is too old.
+
+        Args:
+            ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL' for Apple Inc.).
+
+        Returns:
+            pd.Series: Amounts indexed by ex-date (DatetimeIndex), oldest first.
+        """
+        self.refresh(ticker_symbol)
+        return self.events([ticker_symbol]).get(ticker_symbol, pd.Series(dtype=float, index=pd.DatetimeIndex([])))
+
+    def events(self, ticker_symbols) -> dict:
+        """
+        Read the stored events of many tickers with one query, without checking for new events.
+
+        Args:
+            ticker_symbols: Iterable of ticker symbols.
+
+        Returns:
+            dict: ticker_symbol -> pd.Series of amounts indexed by ex-date, only tickers with events.
+        """
+        ticker_symbols = list(ticker_symbols)
+        if not ticker_symbols or (self.connection is None and not os.path.exists(self.db_file)):
+            return {}
+        connection = self._ensure_open()
+        placeholders = ','.join('?' * len(ticker_symbols))
+        with self.lock:
+            rows = connection.execute(f'''SELECT ticker_symbol, ex_date, amount FROM dividend_events
+                                          WHERE ticker_symbol IN ({placeholders})
+                                          ORDER BY ticker_symbol, ex_date;''', ticker_symbols).fetchall()
+        frame = pd.DataFrame(rows, columns=['ticker_symbol', 'ex_date', 'amount'])
+        frame['ex_date'] = pd.to_datetime(frame['ex_date'])
+        return {ticker: group.set_index('ex_date')['amount'].rename_axis(None)
+                for ticker, group in frame.groupby('ticker_symbol', sort=False)}
+
+    def refresh(self, ticker_symbol: str, force: bool = False) -> None:
+        """
+        Fetch the dividend events since the last known ex-date of a ticker.
+
+        Args:
+            ticker_symbol (str): The stock ticker symbol.
+            force (bool): Check even if the last check is younger than refresh_seconds.
+        """
+        connection = self._ensure_open()
+        with self.lock:
+            row = connection.execute('''SELECT c.checked, (SELECT MAX(e.ex_date) FROM dividend_events e
+                                                           WHERE e.ticker_symbol = ?)
+                                        FROM (SELECT ? AS ticker_symbol) t
+                                        LEFT JOIN dividend_checks c ON c.ticker_symbol = t.ticker_symbol;''',
+                                     (ticker_symbol, ticker_symbol)).fetchone()
+        checked, last_ex_date = row
+        if not force and checked is not None and time.time() - checked < self.refresh_seconds:
+            return
+        self.flights.do(ticker_symbol, lambda: self._fetch(ticker_symbol, checked, last_ex_date))
+
+    def _fetch(self, ticker_symbol: str, checked: float | None, last_ex_date: str | None) -> None:
+        start = None
+        if checked is not None and last_ex_date is not None:
+            start = (pd.Timestamp(last_ex_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        elif checked is not None:
+            # bisher keine Dividenden: nur seit der letzten Prüfung nachsehen
+            start = (pd.Timestamp(checked, unit='s') - pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        now = time.time()
+        if start is not None and pd.Timestamp(start) > pd.Timestamp.now():
+            dividends = pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+        else:
+            try:
+                dividends = market_data.get_provider().dividends(ticker_symbol, start)
+            except Exception as e:
+                print(f"Error: Could not fetch dividends for {ticker_symbol}: {e}")
+                return
+        rows = dividend_rows(ticker_symbol, dividends)
+        connection = self._ensure_open()
+        with self.lock, connection:
+            connection.executemany('''INSERT OR REPLACE INTO dividend_events (ticker_symbol, ex_date, amount)
+                                      VALUES (?, ?, ?);''', rows)
+            connection.execute('INSERT OR REPLACE INTO dividend_checks (ticker_symbol, checked) VALUES (?, ?);',
+                               (ticker_symbol, now))
+
+
+DIVIDENDS = DividendStore()
@@ -0,0 +1,444 @@
+import time
+import heapq
+import random
+import itertools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, wait
+from functools import wraps
+
+"""
+This file is part of "The Portfolio".
+
+"The Portfolio"is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+"The Portfolio" is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Thread pool for network bound calls with a concurrency limit per host, retries with
+exponential backoff and timeouts, so loops over many tickers can run in parallel.
+All Yahoo Finance requests pass the rate limit scheduler (SCHEDULER), which spaces them
+with a token bucket per endpoint, serves interactive requests before prefetching and
+backs off when Yahoo answers with HTTP 429.
+"""
+
+# Maximal gleichzeitige Anfragen je Host
+HOST_LIMITS = {
+    'yahoo': 8,
+}
+DEFAULT_HOST_LIMIT = 4
+
+# Prioritäten, kleinere Zahl wird zuerst bedient
+PRIORITY_INTERACTIVE = 0  # Daten des sichtbaren Tabs
+PRIORITY_BACKGROUND = 5  # Aktualisierungen im Hintergrund
+PRIORITY_PREFETCH = 10  # Cache-Warm-up
+
+# Endpunkt -> (Anfragen pro Sekunde, Burst)
+ENDPOINT_RATES = {
+    'info': (2.0, 5),  # quoteSummary: Ticker.info, yahooquery price
+    'history': (4.0, 10),  # chart: Ticker.history, Ticker.dividends
+    'quote': (2.0, 4),  # Sammelabfrage von Kursen
+    'search': (1.0, 3),
+}
+
+_context = threading.local()
+
+
+def current_priority() -> int:
+    """
+    Returns:
+        int: The request priority of the calling thread (PRIORITY_INTERACTIVE if not set).
+    """
+    return getattr(_context, 'priority', PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def priority(level: int):
+    """
+    Run the requests of the enclosed block, including the ones it submits to the fetch engine,
+    with the given priority.
+
+    Args:
+        level (int): One of the PRIORITY_* constants.
+    """
+    previous = current_priority()
+    _context.priority = level
+    try:
+        yield
+    finally:
+        _context.priority = previous
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Args:
+        error (Exception): Exception raised by yfinance or yahooquery.
+
+    Returns:
+        bool: True if the server refused the request because of too many requests.
+    """
+    text = str(error).lower()
+    return (type(error).__name__ == 'YFRateLimitError' or '429' in text or
+            'too many requests' in text or 'rate limit' in text)
+
+
+class TokenBucket:
+    """
+    Allows rate requests per second with bursts of up to burst requests. Waiting callers are
+    served by priority, then in arrival order. After a rate limit answer the bucket pauses
+    and halves its rate; every success raises the rate again up to the configured maximum.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int) -> None:
+        """
+        Args:
+            name (str): Name of the endpoint, for messages.
+            rate (float): Maximum requests per second.
+            burst (int): Maximum number of requests sent without waiting.
+        """
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.strikes = 0
+        self.condition = threading.Condition()
+        self.waiting = []  # Heap von (Priorität, Reihenfolge)
+        self.sequence = itertools.count()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, level: int = PRIORITY_INTERACTIVE) -> None:
+        """
+        Wait until a request may be sent.
+
+        Args:
+            level (int): Priority of the request.
+        """
+        with self.condition:
+            ticket = (level, next(self.sequence))
+            heapq.heappush(self.waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    first = self.waiting[0] == ticket
+                    if first and now >= self.blocked_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    if not first:
+                        delay = None  # geweckt, sobald der Vordermann fertig ist
+                    elif now < self.blocked_until:
+                        delay = self.blocked_until - now
+                    else:
+                        delay = (1 - self.tokens) / self.rate
+                    self.condition.wait(delay)
+            finally:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                self.condition.notify_all()
+
+    def success(self) -> None:
+        """Raise the rate again after a successful request."""
+        with self.condition:
+            self.strikes = 0
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def penalize(self) -> float:
+        """
+        Pause the endpoint after a rate limit answer and halve its rate.
+
+        Returns:
+            float: The pause in seconds.
+        """
+        with self.condition:
+            self.strikes += 1
+            pause = min(60.0, 2.0 ** self.strikes) * random.uniform(0.8, 1.2)
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            self.condition.notify_all()
+        print(f"Warning: Yahoo Finance rate limit on '{self.name}', pausing {pause:.0f} s, "
+              f"rate now {self.rate:.2f}/s")
+        return pause
+
+
+class RequestScheduler:
+    """
+    Central gate for all Yahoo Finance requests with one TokenBucket per endpoint.
+    """
+
+    def __init__(self, endpoint_rates: dict = ENDPOINT_RATES, retries: int = 4) -> None:
+        """
+        Args:
+            endpoint_rates (dict): endpoint -> (requests per second, burst).
+            retries (int): Retries of a request answered with a rate limit error.
+        """
+        self.buckets = {name: TokenBucket(name, rate, burst) for name, (rate, burst) in endpoint_rates.items()}
+        self.retries = retries
+
+    def call(self, endpoint: str, func, *args, **kwargs):
+        """
+        Send one request through the bucket of endpoint, retrying it after rate limit errors.
+
+        Args:
+            endpoint (str): Key of ENDPOINT_RATES.
+            func: Function doing the request.
+            *args, **kwargs: Arguments of func.
+
+        Returns:
+            The result of func.
+
+        Raises:
+            Exception: The last exception of func if it is not a rate limit error or all retries failed.
+        """
+        bucket = self.buckets[endpoint]
+        for attempt in range(self.retries + 1):
+            bucket.acquire(current_priority())
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.retries:
+                    if is_rate_limit_error(e):
+                        print(f"Error: Yahoo Finance rate limit on '{endpoint}', giving up after {attempt + 1} tries")
+                    raise
+                bucket.penalize()
+                continue
+            bucket.success()
+            return result
+
+
+class PriorityExecutor:
+    """
+    Thread pool whose queue is ordered by priority, then by submission. Prefetch jobs
+    (PRIORITY_PREFETCH and lower priorities) occupy at most prefetch_workers threads, so a
+    backlog of warm-up jobs never holds all threads when an interactive job arrives.
+    """
+
+    def __init__(self, max_workers: int = 16, prefetch_workers: int = 4, thread_name_prefix: str = "fetch") -> None:
+        """
+        Args:
+            max_workers (int): Number of threads.
+            prefetch_workers (int): Maximum number of threads running prefetch jobs at the same time.
+            thread_name_prefix (str): Name prefix of the threads.
+        """
+        self.max_workers = max_workers
+        self.prefetch_workers = max(1, min(prefetch_workers, max_workers))
+        self.thread_name_prefix = thread_name_prefix
+        self.condition = threading.Condition()
+        self.queue = []  # Heap von (Priorität, Reihenfolge, Future, Funktion, Argumente)
+        self.sequence = itertools.count()
+        self.threads = []
+        self.idle = 0
+        self.running_prefetch = 0
+
+    def submit(self, level: int, func, *args) -> Future:
+        """
+        Queue func(*args) with the given priority.
+
+        Returns:
+            Future: Future of the result.
+        """
+        future = Future()
+        with self.condition:
+            heapq.heappush(self.queue, (level, next(self.sequence), future, func, args))
+            # Threads werden erst bei Bedarf gestartet
+            if self.idle == 0 and len(self.threads) < self.max_workers:
+                thread = threading.Thread(target=self._work, daemon=True,
+                                          name=f"{self.thread_name_prefix}_{len(self.threads)}")
+                self.threads.append(thread)
+                thread.start()
+            self.condition.notify()
+        return future
+
+    def _next_job(self):
+        with self.condition:
+            while True:
+                if self.queue:
+                    prefetch = self.queue[0][0] >= PRIORITY_PREFETCH
+                    # vorne liegt Warm-up nur, wenn nichts Dringenderes wartet
+                    if not prefetch or self.running_prefetch < self.prefetch_workers:
+                        if prefetch:
+                            self.running_prefetch += 1
+                        return prefetch, heapq.heappop(self.queue)
+                self.idle += 1
+                self.condition.wait()
+                self.idle -= 1
+
+    def _work(self) -> None:
+        while True:
+            prefetch, (_, _, future, func, args) = self._next_job()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(func(*args))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                if prefetch:
+                    with self.condition:
+                        self.running_prefetch -= 1
+                        self.condition.notify()
+
+
+class FetchEngine:
+    """
+    Runs functions on a shared thread pool. Every call names a host; at most HOST_LIMITS[host]
+    calls of the same host run at the same time. Queued calls start by priority (see PriorityExecutor).
+    A call that raises is retried with exponential backoff and jitter, except for rate limit
+    errors, which the SCHEDULER has already retried.
+    """
+
+    def __init__(self, max_workers: int = 16, retries: int = 2, backoff: float = 0.5,
+                 timeout: float = 30.0, prefetch_workers: int = 4) -> None:
+        """
+        Args:
+            max_workers (int): Size of the thread pool.
+            retries (int): Number of retries after an exception.
+            backoff (float): Delay before the first retry in seconds, doubled for every further retry.
+            timeout (float): Default time gather() waits for results in seconds.
+            prefetch_workers (int): Threads that may run prefetch calls at the same time.
+        """
+        self.executor = PriorityExecutor(max_workers, prefetch_workers)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.semaphores: dict[str, threading.BoundedSemaphore] = {}
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.BoundedSemaphore(HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT))
+            return self.semaphores[host]
+
+    def _run(self, func, args, kwargs, host: str, retries: int, level: int):
+        semaphore = self._semaphore(host)
+        with priority(level):
+            for attempt in range(retries + 1):
+                try:
+                    with semaphore:
+                        return func(*args, **kwargs)
+                except Exception as e:
+                    # Rate Limits hat der SCHEDULER schon mit Backoff wiederholt
+                    if attempt == retries or is_rate_limit_error(e):
+                        raise
+                    time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def submit(self, func, *args, host: str = 'yahoo', retries: int | None = None, **kwargs) -> Future:
+        """
+        Run func(*args, **kwargs) on the pool with the priority of the calling thread.
+        Calls with a higher priority start before queued calls with a lower one.
+
+        Args:
+            func: The function to call.
+            *args: Positional arguments of func.
+            host (str): Host the call talks to, for the concurrency limit.
+            retries (int or None): Retries after an exception, None for the engine default.
+            **kwargs: Keyword arguments of func.
+
+        Returns:
+            Future: Future of the result.
+
+        Example:
+            An interactive call submitted after a backlog of prefetch calls finishes first:
+
+            >>> engine = FetchEngine(max_workers=2, prefetch_workers=1)
+            >>> release, finished = threading.Event(), []
+            >>> def job(name, blocking):
+            ...     if blocking:
+            ...         release.wait(5)
+            ...     finished.append(name)
+            >>> with priority(PRIORITY_PREFETCH):
+            ...     backlog = [engine.submit(job, f"prefetch {i}", True) for i in range(4)]
+            >>> engine.submit(job, "interactive", False).result(5)
+            >>> release.set()
+            >>> wait(backlog, 5).not_done
+            set()
+            >>> finished[0]
+            'interactive'
+        """
+        level = current_priority()
+        return self.executor.submit(level, self._run, func, args, kwargs, host,
+                                    self.retries if retries is None else retries, level)
+
+    def gather(self, futures: dict, timeout: float | None = None, default=None) -> dict:
+        """
+        Wait for a dict of futures.
+
+        Args:
+            futures (dict): key -> Future.
+            timeout (float or None): Maximum total wait in seconds, None for the engine default.
+            default: Result of futures that failed or did not finish in time.
+
+        Returns:
+            dict: key -> result.
+        """
+        wait(futures.values(), timeout=self.timeout if timeout is None else timeout)
+        results = {}
+        for key, future in futures.items():
+            if not future.done():
+                print(f"Error: Fetch for {key} timed out")
+                results[key] = default
+            elif future.exception() is not None:
+                print(f"Error: Fetch for {key} failed: {future.exception()}")
+                results[key] = default
+            else:
+                results[key] = future.result()
+        return results
+
+    def fetch_all(self, func, keys, host: str = 'yahoo', timeout: float | None = None, default=None) -> dict:
+        """
+        Call func(key) for all keys in parallel and wait for the results.
+
+        Args:
+            func: Function with one argument, e.g. a stockdata function taking a ticker symbol.
+            keys: Iterable of arguments.
+            host (str): Host the calls talk to.
+            timeout (float or None): Maximum total wait in seconds, None for the engine default.
+            default: Result of calls that failed or timed out.
+
+        Returns:
+            dict: key -> result.
+
+        Example:
+            >>> ENGINE.fetch_all(lambda x: x * 2, [1, 2, 3])
+            {1: 2, 2: 4, 3: 6}
+        """
+        futures = {key: self.submit(func, key, host=host) for key in dict.fromkeys(keys)}
+        return self.gather(futures, timeout, default)
+
+    def futures_variant(self, func, host: str = 'yahoo'):
+        """
+        Create a variant of func that runs on the pool and returns a Future.
+
+        Args:
+            func: The function to wrap.
+            host (str): Host the calls talk to.
+
+        Returns:
+            Function with the signature of func returning a Future.
+        """
+        @wraps(func)
+        def submit(*args, **kwargs) -> Future:
+            return self.submit(func, *args, host=host, **kwargs)
+
+        return submit
+
+
+ENGINE = FetchEngine()
+SCHEDULER = RequestScheduler()
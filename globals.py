@@ -1,6 +1,8 @@
 import json
 import os
 
+import tools
+
 """
 This file is part of "The Portfolio".
 
@@ -64,8 +66,7 @@ def load_user_config():
 
 
 def save_user_config():
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(USER_CONFIG, f, indent=4)
+    tools.atomic_write_json(CONFIG_FILE, USER_CONFIG, indent=4)
 
 
 USER_CONFIG = load_user_config()
@@ -0,0 +1,276 @@
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+import tools
+import market_data
+
+"""
+This file is part of "The Portfolio".
+
+"The Portfolio"is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+"The Portfolio" is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Local OHLCV history per (ticker, interval) that is extended incrementally instead of downloaded again.
+The charts of all timespans are slices of the stored series, optionally downsampled.
+"""
+
+HISTORY_COLUMNS = ('prices', 'volumes', 'opens', 'highs', 'lows')
+
+
+def history_to_columns(hist: pd.DataFrame) -> dict:
+    """
+    Convert a yfinance history DataFrame into the column dict used for charting.
+    The columns are kept as DatetimeIndex and NumPy arrays, so they can be stored in
+    the binary columnar format of tools.CacheStore without per-value conversion.
+
+    Args:
+        hist (pd.DataFrame): History with a DatetimeIndex and Open/High/Low/Close/Volume columns.
+
+    Returns:
+        dict: Keys dates, prices, volumes, opens, highs, lows.
+    """
+    return {
+        'dates': hist.index,
+        'prices': hist['Close'].to_numpy(),
+        'volumes': hist['Volume'].to_numpy(),
+        'opens': hist['Open'].to_numpy(),
+        'highs': hist['High'].to_numpy(),
+        'lows': hist['Low'].to_numpy()
+    }
+
+
+def slice_history(data: dict | None, start: pd.Timestamp | None = None) -> dict | None:
+    """
+    Get the bars from start on without copying the columns.
+
+    Args:
+        data (dict or None): Column dict as returned by history_to_columns.
+        start (pd.Timestamp or None): First point in time, naive timestamps are taken in the
+            timezone of the data. None returns all bars.
+
+    Returns:
+        dict or None: Column dict of the slice, None if it is empty.
+    """
+    if data is None:
+        return None
+    dates = data['dates']
+    first = 0
+    if start is not None:
+        if dates.tz is not None and start.tzinfo is None:
+            start = start.tz_localize(dates.tz)
+        first = dates.searchsorted(start)
+    if first >= len(dates):
+        return None
+    return {key: values[first:] for key, values in data.items()}
+
+
+def downsample_history(data: dict | None, max_points: int | None) -> dict | None:
+    """
+    Aggregate consecutive bars into at most max_points OHLCV bars (open of the first, close of the
+    last, highest high, lowest low, summed volume), so long ranges plot as fast as short ones.
+
+    Args:
+        data (dict or None): Column dict as returned by history_to_columns.
+        max_points (int or None): Maximum number of bars, None to keep all.
+
+    Returns:
+        dict or None: Column dict with the dates of the last bar of each group.
+    """
+    if data is None or max_points is None or len(data['dates']) <= max_points:
+        return data
+    count = len(data['dates'])
+    step = -(-count // max_points)
+    starts = np.arange(0, count, step)
+    ends = np.append(starts[1:] - 1, count - 1)
+    return {
+        'dates': data['dates'][ends],
+        'prices': data['prices'][ends],
+        'volumes': np.add.reduceat(data['volumes'], starts),
+        'opens': data['opens'][starts],
+        'highs': np.maximum.reduceat(data['highs'], starts),
+        'lows': np.minimum.reduceat(data['lows'], starts)
+    }
+
+
+class HistoryStore:
+    """
+    OHLCV bars of all tickers in one columnar CacheStore, keyed by ticker and interval.
+    A refresh downloads only the bars since the last stored one and appends them.
+    If the overlapping bar no longer matches (split or dividend adjustment of the past
+    prices by Yahoo Finance), the full history is downloaded again.
+    Intraday intervals keep only a limited window (INTRADAY_WINDOWS), Yahoo Finance
+    does not deliver more anyway.
+    Stored histories are stale-while-revalidate: an outdated history is returned at once while the
+    revalidation pool of tools extends it and notifies the refresh listeners, so the live redraws
+    of the Day chart never wait for a download. Only a ticker without stored bars blocks.
+    """
+    # Intervall -> (Zeitraum beim ersten Download, wie lange Bars behalten werden)
+    INTRADAY_WINDOWS = {
+        '1m': ("5d", pd.DateOffset(days=5)),
+        '2m': ("5d", pd.DateOffset(days=5)),
+        '5m': ("5d", pd.DateOffset(days=5)),
+        '15m': ("1mo", pd.DateOffset(months=1)),
+        '30m': ("1mo", pd.DateOffset(months=1)),
+        '60m': ("3mo", pd.DateOffset(months=3)),
+        '1h': ("3mo", pd.DateOffset(months=3)),
+    }
+
+    def __init__(self, cache_file: str = "stock_history.json", refresh_seconds: int = 3600,
+                 intraday_refresh_seconds: int = 60, hot_entries: int = 16,
+                 stale_while_revalidate: int = 604800) -> None:
+        """
+        Args:
+            cache_file (str): Name of the cache; the data is stored next to it as .sqlite.
+            refresh_seconds (int): Age of daily or longer bars after which the history is extended.
+            intraday_refresh_seconds (int): The same for intraday intervals.
+            hot_entries (int): Number of histories kept decoded in memory.
+            stale_while_revalidate (int): Seconds after the refresh age during which a stored history
+                is still served while it is extended in the background.
+        """
+        self.store = tools.CacheStore(cache_file, columnar=True)
+        self.refresh_seconds = refresh_seconds
+        self.intraday_refresh_seconds = intraday_refresh_seconds
+        self.stale_while_revalidate = stale_while_revalidate
+        self.hot = tools.HotCache(hot_entries)
+        self.flights = tools.SingleFlight()
+        self.lock = threading.Lock()
+        self.refreshing = set()
+        self.stats = tools.CacheStats(self.get_history, "persistent", refresh_seconds, store=self.store)
+        self.flights.stats = self.stats
+
+    def _lookup(self, key: str) -> tuple | None:
+        """
+        Returns:
+            tuple or None: (history, timestamp, key) from memory or the store, None if nothing is stored.
+        """
+        entry = self.hot.get(key)
+        if entry is None and key in self.store:
+            timestamp = self.store.timestamp(key)
+            try:
+                entry = (self.store.load(key), timestamp, key)
+                self.hot.put(key, *entry)
+            except KeyError:
+                entry = None
+        return entry
+
+    def _age(self, entry: tuple | None) -> float | None:
+        return time.time() - entry[1] if entry is not None and entry[1] is not None else None
+
+    def get_history(self, ticker_symbol: str, interval: str = "1d") -> dict | None:
+        """
+        Get the complete stored history of a ticker, extended with the newest bars if it is older
+        than refresh_seconds (intraday_refresh_seconds for intraday intervals).
+        A history up to stale_while_revalidate seconds older than that is returned unchanged and
+        extended in the background.
+
+        Args:
+            ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL' for Apple Inc.).
+            interval (str): yfinance bar interval.
+
+        Returns:
+            dict or None: Keys dates (DatetimeIndex), prices, volumes, opens, highs, lows (NumPy arrays),
+                None if no data is available.
+        """
+        key = f"{ticker_symbol}|{interval}"
+        entry = self._lookup(key)
+        age = self._age(entry)
+        refresh_seconds = self.intraday_refresh_seconds if interval in self.INTRADAY_WINDOWS else self.refresh_seconds
+        if age is not None and age < refresh_seconds:
+            self.stats.count('hits')
+            return entry[0]
+        if age is not None and age < refresh_seconds + self.stale_while_revalidate:
+            # gespeicherte Bars sofort liefern, im Hintergrund verlängern
+            self.stats.count('stale')
+            tools.revalidate_in_background(
+                self.get_history, (ticker_symbol, interval), {}, self.refreshing, self.lock, key,
+                lambda: self.flights.do(key, lambda: self._refresh(ticker_symbol, interval, key, 'refreshes'),
+                                        count=False))
+            return entry[0]
+        return self.flights.do(key, lambda: self._refresh(ticker_symbol, interval, key))
+
+    def _refresh(self, ticker_symbol: str, interval: str, key: str, counter: str = 'misses') -> dict | None:
+        """
+        Download the missing bars (or the full history) and store the result.
+
+        Args:
+            counter (str): Statistics counter of the download, 'refreshes' for background refreshes.
+
+        Returns:
+            dict or None: The updated history, the old one if the download failed.
+        """
+        # ein anderer Aufrufer könnte die Historie inzwischen verlängert haben
+        entry = self._lookup(key)
+        age = self._age(entry)
+        refresh_seconds = self.intraday_refresh_seconds if interval in self.INTRADAY_WINDOWS else self.refresh_seconds
+        if age is not None and age < refresh_seconds:
+            if counter == 'misses':
+                self.stats.count('hits')
+            return entry[0]
+        data = entry[0] if entry is not None else None
+        self.stats.count(counter)
+        start = time.perf_counter()
+        try:
+            provider = market_data.get_provider()
+            updated = None
+            period, window = self.INTRADAY_WINDOWS.get(interval, ("max", None))
+            if data is not None and len(data['dates']) >= 2:
+                # Intraday ab dem vorletzten Bar selbst laden, nicht ab Tagesbeginn
+                anchor = data['dates'][-2]
+                first = anchor.isoformat() if window is not None else anchor.strftime("%Y-%m-%d")
+                updated = self._append(data, provider.history(ticker_symbol, interval, start=first))
+            if updated is None:
+                hist = provider.history(ticker_symbol, interval, period=period)
+                updated = history_to_columns(hist) if not hist.empty else None
+            if updated is not None and window is not None:
+                updated = slice_history(updated, updated['dates'][-1] - window)
+        except Exception as e:
+            print(f"Error: Could not update history of {ticker_symbol}: {e}")
+            return data
+        finally:
+            self.stats.record_latency(time.perf_counter() - start)
+        if updated is None:
+            return data
+        now = time.time()
+        self.store.store(key, updated, now)
+        self.hot.put(key, updated, now, key)
+        return updated
+
+    @staticmethod
+    def _append(data: dict, hist: pd.DataFrame) -> dict | None:
+        """
+        Append freshly downloaded bars to a stored history.
+        The download starts at the second last stored bar, which is complete and must be unchanged.
+
+        Returns:
+            dict or None: The merged history, None if the stored bars are outdated.
+        """
+        if hist.empty:
+            return data
+        new = history_to_columns(hist)
+        anchor = data['dates'][-2]
+        position = new['dates'].searchsorted(anchor)
+        if (position >= len(new['dates']) or new['dates'][position] != anchor or
+                not np.isclose(new['prices'][position], data['prices'][-2], rtol=1e-4)):
+            return None
+        cut = data['dates'].searchsorted(new['dates'][0])
+        merged = {'dates': data['dates'][:cut].append(new['dates'])}
+        for column in HISTORY_COLUMNS:
+            merged[column] = np.concatenate((data[column][:cut], new[column]))
+        return merged
+
+
+HISTORY = HistoryStore()
@@ -1,4 +1,5 @@
 import os
+import hashlib
 import logging
 import datetime
 import re
@@ -48,7 +49,7 @@ def from_folder(dir_path, db: Db.Db):
             if file_ext == '.pdf':
                 try:
                     transactions = pdf_reader(file_path)
-                    process_transactions(db, transactions)
+                    process_transactions(db, transactions, statement_source(file_path))
                     transactions_imported += len(transactions)
                     files_processed += 1
 
@@ -60,16 +61,41 @@ def from_folder(dir_path, db: Db.Db):
     logger.info(f"Import completed. Files processed: {files_processed}, Transactions imported: {transactions_imported}")
 
 
-def process_transactions(db: Db.Db, transactions: list):
+def statement_source(file_path: str) -> str:
+    """
+    Identify an account statement by its content, so a statement imported again (also from a
+    different path) is recognized.
+
+    Args:
+        file_path (str): Path of the statement file.
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def process_transactions(db: Db.Db, transactions: list, source: str | None = None):
     """
     Process a single transaction and update the database accordingly.
 
     Args:
         db (Db): An instance of the Db class to interact with the database.
         transactions (dict): A dictionary containing transaction details.
+        source (str or None): Identity of the statement (see statement_source). Every trade gets the
+            key "source:row", so importing the statement again skips its trades while equal trades
+            from different rows are all kept. None imports without keys.
     """
 
-    for transaction in transactions:
+    stocknames = {}
+    trades = []
+    dividends = []
+    for row, transaction in enumerate(transactions):
+        source_key = f"{source}:{row}" if source is not None else None
         ticker_symbol = transaction['ticker']
         stockname = transaction['stockname']
         quantity = transaction['quantity']
@@ -81,21 +107,29 @@ def process_transactions(db: Db.Db, transactions: list):
             continue
 
         if transaction['type'] == 'Buy':
-            db.add_stockname_ticker(stockname, ticker_symbol)
-            db.add_stock_trade(ticker_symbol, quantity, price, trade_date)
+            stocknames.setdefault(ticker_symbol, stockname)
+            trades.append((ticker_symbol, quantity, price, trade_date, source_key))
             logging.info(f"Added Buy transaction: {quantity} of {ticker_symbol} at {price} on {trade_date}")
         elif transaction['type'] == 'Sell':
-            db.add_stockname_ticker(stockname, ticker_symbol)
-            db.add_stock_trade(ticker_symbol, -quantity, -price, trade_date)
+            stocknames.setdefault(ticker_symbol, stockname)
+            trades.append((ticker_symbol, -quantity, -price, trade_date, source_key))
             logging.info(f"Processed Sell transaction: {quantity} of {ticker_symbol} at {price} on {trade_date}")
         elif transaction['type'] =='Dividend':
-            db.add_dividend_payment(ticker_symbol, trade_date, price)
+            dividends.append((ticker_symbol, trade_date, price))
             logging.info(f"Processed Dividend transaction: {ticker_symbol} dividend of {price} on {trade_date}")
         else:
             logging.warning(
                 f"Unknown transaction type {transaction['type']} for stockname {stockname}. Skipping transaction.")
             continue
 
+    # alles in einer Transaktion: Namen zuerst (Fremdschlüssel), bereits importierte Zeilen überspringt die Datenbank
+    with db.batch():
+        for ticker_symbol, stockname in stocknames.items():
+            db.add_stockname_ticker(stockname, ticker_symbol)
+        db.add_stock_trades_bulk(trades)
+        for ticker_symbol, payment_date, amount in dividends:
+            db.add_dividend_payment(ticker_symbol, payment_date, amount)
+
 
 def pdf_reader(file_path):
     """
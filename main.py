@@ -1,6 +1,9 @@
 import os
 import sys
+import argparse
 
+import cache_warmup
+import stockdata
 from Gui import BrokerApp
 
 """
@@ -24,11 +27,26 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 
 
 def main():
+    parser = argparse.ArgumentParser(description="The Portfolio")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="prefetch the stock data caches for the held portfolio and exit (e.g. from cron)")
+    args = parser.parse_args()
+
     if getattr(sys, 'frozen', False):
         os.chdir(os.path.dirname(sys.executable))
         #for _ in  range(3):
         #    os.chdir(os.pardir)
 
+    stockdata.remove_obsolete_history_caches()
+    tickers = cache_warmup.get_held_tickers()
+    if args.warm_cache:
+        result = cache_warmup.warm_cache(tickers)
+        print(f"Warmed {result['calls']} cache entries for {result['tickers']} tickers "
+              f"in {result['seconds']:.1f} s ({result['errors']} errors)")
+        sys.exit(1 if result['errors'] else 0)
+
+    # Prefetch in parallel while the tabs are built; their calls join the running fetches.
+    cache_warmup.start_background_warm_up(tickers)
     broker_app = BrokerApp()
     if broker_app is not None:
         broker_app.run()
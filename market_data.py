@@ -0,0 +1,351 @@
+import json
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+import yahooquery
+
+import globals
+import tools
+from fetch_engine import SCHEDULER
+
+"""
+This file is part of "The Portfolio".
+
+"The Portfolio"is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+"The Portfolio" is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Market data providers behind stockdata, history_store and ticker_snapshot.
+The provider is chosen with "MARKET_DATA_PROVIDER" in config.json:
+    "yahoo"  - live data from Yahoo Finance (default)
+    "record" - live data from Yahoo Finance, every answer is also written to the recording
+    "replay" - answers only from the recording, offline and deterministic
+The recording is the SQLite file next to "MARKET_DATA_RECORDING" (default market_data_recording.json).
+"""
+
+DEFAULT_RECORDING = "market_data_recording.json"
+
+
+class MarketDataProvider:
+    """
+    Raw market data requests. Implementations raise an exception if data is not available.
+    """
+
+    def info(self, ticker_symbol: str) -> dict:
+        """
+        Returns:
+            dict: The yfinance Ticker.info of ticker_symbol.
+        """
+        raise NotImplementedError
+
+    def history(self, ticker_symbol: str, interval: str = "1d", period: str | None = None,
+                start: str | None = None) -> pd.DataFrame:
+        """
+        Args:
+            ticker_symbol (str): The stock ticker symbol.
+            interval (str): Bar interval.
+            period (str or None): Period like "max" or "5d", if start is not given.
+            start (str or None): First day (YYYY-MM-DD), or first bar as ISO timestamp for intraday intervals.
+
+        Returns:
+            pd.DataFrame: OHLCV bars with a DatetimeIndex.
+        """
+        raise NotImplementedError
+
+    def dividends(self, ticker_symbol: str, start: str | None = None) -> pd.Series:
+        """
+        Args:
+            ticker_symbol (str): The stock ticker symbol.
+            start (str or None): Only events from this day on (YYYY-MM-DD), None for all.
+
+        Returns:
+            pd.Series: Dividend amounts with a DatetimeIndex.
+        """
+        raise NotImplementedError
+
+    def quotes(self, ticker_symbols: list[str]) -> dict:
+        """
+        Returns:
+            dict: ticker_symbol -> quote dict (regularMarketPrice, currency, ...), missing symbols are left out.
+        """
+        raise NotImplementedError
+
+    def price(self, symbols: list[str]) -> dict:
+        """
+        Returns:
+            dict: symbol -> yahooquery price module (used for exchange rates like EURUSD=X).
+        """
+        raise NotImplementedError
+
+    def search(self, query: str) -> dict:
+        """
+        Returns:
+            dict: yahooquery search result with a 'quotes' list.
+        """
+        raise NotImplementedError
+
+
+class YahooProvider(MarketDataProvider):
+    """
+    Live data from Yahoo Finance via yfinance and yahooquery, spaced by the request scheduler.
+    """
+
+    def info(self, ticker_symbol: str) -> dict:
+        return SCHEDULER.call('info', lambda: yf.Ticker(ticker_symbol).info) or {}
+
+    def history(self, ticker_symbol: str, interval: str = "1d", period: str | None = None,
+                start: str | None = None) -> pd.DataFrame:
+        ticker = yf.Ticker(ticker_symbol)
+        if start is not None:
+            # yfinance liest Strings nur als Datum, Zeitpunkte als datetime übergeben
+            first = pd.Timestamp(start).to_pydatetime() if len(start) > 10 else start
+            return SCHEDULER.call('history', ticker.history, start=first, interval=interval)
+        return SCHEDULER.call('history', ticker.history, period=period or "max", interval=interval)
+
+    def dividends(self, ticker_symbol: str, start: str | None = None) -> pd.Series:
+        if start is None:
+            return SCHEDULER.call('history', lambda: yf.Ticker(ticker_symbol).dividends)
+        # nur die Tage seit start laden statt der ganzen Historie
+        hist = SCHEDULER.call('history', yf.Ticker(ticker_symbol).history, start=start, interval="1d", actions=True)
+        if hist.empty or 'Dividends' not in hist:
+            return pd.Series(dtype=float, index=pd.DatetimeIndex([]), name='Dividends')
+        return hist.loc[hist['Dividends'] > 0, 'Dividends']
+
+    def quotes(self, ticker_symbols: list[str]) -> dict:
+        def request():
+            quotes = yahooquery.Ticker(ticker_symbols).quotes
+            if not isinstance(quotes, dict):
+                # yahooquery liefert Fehler (z.B. Rate Limit) als Text statt als Exception
+                raise RuntimeError(str(quotes))
+            return quotes
+
+        return SCHEDULER.call('quote', request)
+
+    def price(self, symbols: list[str]) -> dict:
+        prices = SCHEDULER.call('info', lambda: yahooquery.Ticker(symbols).price)
+        return prices if isinstance(prices, dict) else {}
+
+    def search(self, query: str) -> dict:
+        return SCHEDULER.call('search', yahooquery.search, query)
+
+
+def _to_record(value) -> dict:
+    """
+    Convert a provider answer into a dict for the columnar CacheStore format.
+    """
+    if isinstance(value, pd.DataFrame) and isinstance(value.index, pd.DatetimeIndex) and \
+            all(dtype.kind in "biuf" for dtype in value.dtypes):
+        record = {'__type__': 'frame', '__columns__': [str(column) for column in value.columns], 'index': value.index}
+        for i, column in enumerate(value.columns):
+            record[f'c{i}'] = value[column].to_numpy()
+        return record
+    if isinstance(value, pd.Series) and isinstance(value.index, pd.DatetimeIndex) and value.dtype.kind in "biuf":
+        return {'__type__': 'series', 'name': value.name, 'index': value.index, 'values': value.to_numpy()}
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return {'__type__': 'pandas_json', 'kind': type(value).__name__,
+                'value': value.to_json(orient='split', date_format='iso')}
+    return {'__type__': 'json', 'value': value}
+
+
+def _from_record(record: dict):
+    """
+    Inverse of _to_record.
+    """
+    kind = record['__type__']
+    if kind == 'frame':
+        return pd.DataFrame({column: np.array(record[f'c{i}']) for i, column in enumerate(record['__columns__'])},
+                            index=record['index'])
+    if kind == 'series':
+        return pd.Series(np.array(record['values']), index=record['index'], name=record['name'])
+    if kind == 'pandas_json':
+        if record['kind'] == 'Series':
+            return pd.read_json(StringIO(record['value']), orient='split', typ='series')
+        return pd.read_json(StringIO(record['value']), orient='split')
+    return record['value']
+
+
+class RecordingStore:
+    """
+    The recorded provider answers in a columnar CacheStore, one entry per request.
+    Quotes and prices are stored per symbol, so they can be replayed for any batch.
+    """
+
+    def __init__(self, recording_file: str = DEFAULT_RECORDING) -> None:
+        self.store = tools.CacheStore(recording_file, columnar=True)
+
+    @staticmethod
+    def key(method: str, *args) -> str:
+        return json.dumps([method, *args])
+
+    def save(self, method: str, args: tuple, value) -> None:
+        self.store.store(self.key(method, *args), _to_record(value))
+
+    def load(self, method: str, *args):
+        """
+        Raises:
+            KeyError: If the request was not recorded.
+        """
+        return _from_record(self.store.load(self.key(method, *args)))
+
+
+class RecordingProvider(MarketDataProvider):
+    """
+    Wraps another provider and writes every answer into the recording.
+    """
+
+    def __init__(self, inner: MarketDataProvider, recording: RecordingStore) -> None:
+        self.inner = inner
+        self.recording = recording
+
+    def info(self, ticker_symbol: str) -> dict:
+        info = self.inner.info(ticker_symbol)
+        self.recording.save('info', (ticker_symbol,), info)
+        return info
+
+    def history(self, ticker_symbol: str, interval: str = "1d", period: str | None = None,
+                start: str | None = None) -> pd.DataFrame:
+        hist = self.inner.history(ticker_symbol, interval, period, start)
+        self.recording.save('history', (ticker_symbol, interval, period, start), hist)
+        return hist
+
+    def dividends(self, ticker_symbol: str, start: str | None = None) -> pd.Series:
+        dividends = self.inner.dividends(ticker_symbol, start)
+        self.recording.save('dividends', (ticker_symbol, start), dividends)
+        return dividends
+
+    def quotes(self, ticker_symbols: list[str]) -> dict:
+        quotes = self.inner.quotes(ticker_symbols)
+        for symbol, quote in quotes.items():
+            self.recording.save('quote', (symbol,), quote)
+        return quotes
+
+    def price(self, symbols: list[str]) -> dict:
+        prices = self.inner.price(symbols)
+        for symbol, price in prices.items():
+            self.recording.save('price', (symbol,), price)
+        return prices
+
+    def search(self, query: str) -> dict:
+        result = self.inner.search(query)
+        self.recording.save('search', (query,), result)
+        return result
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves only recorded answers, without network access. Unrecorded requests raise KeyError.
+    A history request that was not recorded with the same start is answered from the recorded
+    full history (period "max" or the intraday period) of the ticker.
+    """
+
+    def __init__(self, recording: RecordingStore) -> None:
+        self.recording = recording
+
+    def info(self, ticker_symbol: str) -> dict:
+        return self.recording.load('info', ticker_symbol)
+
+    def history(self, ticker_symbol: str, interval: str = "1d", period: str | None = None,
+                start: str | None = None) -> pd.DataFrame:
+        try:
+            return self.recording.load('history', ticker_symbol, interval, period, start)
+        except KeyError:
+            pass
+        for recorded_period in ("max", "3mo", "1mo", "5d"):
+            try:
+                hist = self.recording.load('history', ticker_symbol, interval, recorded_period, None)
+            except KeyError:
+                continue
+            if start is None:
+                return hist
+            first = pd.Timestamp(start)
+            if hist.index.tz is not None:
+                first = first.tz_localize(hist.index.tz) if first.tzinfo is None else first.tz_convert(hist.index.tz)
+            return hist[hist.index >= first]
+        raise KeyError(f"No recorded history for {ticker_symbol} ({interval})")
+
+    def dividends(self, ticker_symbol: str, start: str | None = None) -> pd.Series:
+        try:
+            return self.recording.load('dividends', ticker_symbol, start)
+        except KeyError:
+            if start is None:
+                raise
+        dividends = self.recording.load('dividends', ticker_symbol, None)
+        first = pd.Timestamp(start)
+        if dividends.index.tz is not None:
+            first = first.tz_localize(dividends.index.tz)
+        return dividends[dividends.index >= first]
+
+    def quotes(self, ticker_symbols: list[str]) -> dict:
+        quotes = {}
+        for symbol in ticker_symbols:
+            try:
+                quotes[symbol] = self.recording.load('quote', symbol)
+            except KeyError:
+                pass
+        return quotes
+
+    def price(self, symbols: list[str]) -> dict:
+        prices = {}
+        for symbol in symbols:
+            try:
+                prices[symbol] = self.recording.load('price', symbol)
+            except KeyError:
+                pass
+        return prices
+
+    def search(self, query: str) -> dict:
+        return self.recording.load('search', query)
+
+
+def create_provider(name: str, recording_file: str = DEFAULT_RECORDING) -> MarketDataProvider:
+    """
+    Args:
+        name (str): "yahoo", "record" or "replay".
+        recording_file (str): Name of the recording for "record" and "replay".
+
+    Returns:
+        MarketDataProvider: The provider.
+    """
+    if name == "replay":
+        return ReplayProvider(RecordingStore(recording_file))
+    if name == "record":
+        return RecordingProvider(YahooProvider(), RecordingStore(recording_file))
+    if name != "yahoo":
+        print(f"Warning: Unknown market data provider '{name}', using yahoo")
+    return YahooProvider()
+
+
+_provider = create_provider(globals.USER_CONFIG.get("MARKET_DATA_PROVIDER", "yahoo"),
+                            globals.USER_CONFIG.get("MARKET_DATA_RECORDING", DEFAULT_RECORDING))
+
+
+def get_provider() -> MarketDataProvider:
+    """
+    Returns:
+        MarketDataProvider: The provider all market data requests go to.
+    """
+    return _provider
+
+
+def set_provider(provider: MarketDataProvider) -> None:
+    """
+    Replace the provider, e.g. with a ReplayProvider for benchmarks.
+
+    Args:
+        provider (MarketDataProvider): The new provider.
+    """
+    global _provider
+    _provider = provider
@@ -0,0 +1,387 @@
+import time
+import random
+import threading
+
+import numpy as np
+import pandas as pd
+
+import market_data
+from fetch_engine import priority, PRIORITY_BACKGROUND
+
+"""
+This file is part of "The Portfolio".
+
+"The Portfolio"is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+"The Portfolio" is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+Intraday quote ticks of the held tickers in an in-memory ring buffer per ticker.
+The ticks come from an adapter: PollingAdapter asks the market data provider for bulk quotes,
+SimulatedAdapter generates a random walk for tests and demos. A push (websocket) feed only needs
+another QuoteAdapter that calls emit() for every message.
+The adapter is chosen with "QUOTE_STREAM" in config.json: "poll" (default), "simulate" or "off".
+"""
+
+
+class TickBuffer:
+    """
+    Ring buffer of the last capacity ticks (time, price, day volume) of one ticker in NumPy arrays.
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        """
+        Args:
+            capacity (int): Number of ticks kept, older ones are overwritten.
+        """
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.prices = np.zeros(capacity)
+        self.volumes = np.zeros(capacity)
+        self.count = 0  # Anzahl aller je angehängten Ticks
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp: float, price: float, volume: float | None) -> None:
+        """
+        Args:
+            timestamp (float): Time of the quote in seconds since the epoch.
+            price (float): The price.
+            volume (float or None): Accumulated volume of the day, None if unknown.
+        """
+        position = self.count % self.capacity
+        self.times[position] = timestamp
+        self.prices[position] = price
+        self.volumes[position] = np.nan if volume is None else volume
+        self.count += 1
+
+    def last(self) -> tuple | None:
+        """
+        Returns:
+            tuple or None: (time, price, volume) of the newest tick, None if empty.
+        """
+        if self.count == 0:
+            return None
+        position = (self.count - 1) % self.capacity
+        return float(self.times[position]), float(self.prices[position]), float(self.volumes[position])
+
+    def since(self, timestamp: float | None = None) -> tuple:
+        """
+        Get the ticks after timestamp, oldest first.
+
+        Args:
+            timestamp (float or None): Only ticks later than this, None for all.
+
+        Returns:
+            tuple: (times, prices, volumes) as NumPy arrays (copies).
+        """
+        size = len(self)
+        order = (np.arange(self.count - size, self.count)) % self.capacity
+        times = self.times[order]
+        first = 0 if timestamp is None else np.searchsorted(times, timestamp, side='right')
+        order = order[first:]
+        return self.times[order], self.prices[order], self.volumes[order]
+
+
+def append_ticks(data: dict | None, times: np.ndarray, prices: np.ndarray, volumes: np.ndarray) -> dict | None:
+    """
+    Append ticks later than the last bar to a chart column dict (see history_store.history_to_columns).
+    Every tick becomes a bar with open = high = low = close; its volume is the growth of the day volume.
+
+    Args:
+        data (dict or None): Column dict with a DatetimeIndex.
+        times, prices, volumes: Tick arrays as returned by TickBuffer.since.
+
+    Returns:
+        dict or None: The extended column dict, data itself if there is nothing to append.
+
+    Example:
+        >>> bars = {'dates': pd.DatetimeIndex(['2025-01-02 15:00'], tz='UTC'), 'prices': np.array([10.0]),
+        ...         'volumes': np.array([5.0]), 'opens': np.array([9.0]), 'highs': np.array([10.0]),
+        ...         'lows': np.array([9.0])}
+        >>> ticks = np.array([pd.Timestamp('2025-01-02 15:01', tz='UTC').timestamp(),
+        ...                   pd.Timestamp('2025-01-02 15:02', tz='UTC').timestamp()])
+        >>> merged = append_ticks(bars, ticks, np.array([10.5, 10.2]), np.array([100.0, 130.0]))
+        >>> merged['prices'].tolist(), merged['volumes'].tolist()
+        ([10.0, 10.5, 10.2], [5.0, 0.0, 30.0])
+    """
+    if data is None or len(times) == 0:
+        return data
+    last = data['dates'][-1].timestamp()
+    keep = times > last
+    if not keep.any():
+        return data
+    times, prices, volumes = times[keep], prices[keep], volumes[keep]
+    dates = pd.to_datetime(times, unit='s', utc=True)
+    if data['dates'].tz is not None:
+        dates = dates.tz_convert(data['dates'].tz)
+    else:
+        dates = dates.tz_localize(None)
+    tick_volumes = np.nan_to_num(np.diff(volumes, prepend=volumes[0]), nan=0.0).clip(min=0)
+    return {
+        'dates': data['dates'].append(dates),
+        'prices': np.concatenate((data['prices'], prices)),
+        'volumes': np.concatenate((data['volumes'], tick_volumes)),
+        'opens': np.concatenate((data['opens'], prices)),
+        'highs': np.concatenate((data['highs'], prices)),
+        'lows': np.concatenate((data['lows'], prices))
+    }
+
+
+class QuoteAdapter:
+    """
+    Source of quote ticks. start() begins delivering ticks of the subscribed symbols to the
+    stream via stream.emit(), stop() ends it. Symbols can change while the adapter runs.
+    """
+
+    def __init__(self) -> None:
+        self.stream: "QuoteStream | None" = None
+        self.symbols: list[str] = []
+        self.stop_event = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    def subscribe(self, ticker_symbols) -> None:
+        """
+        Args:
+            ticker_symbols: Iterable of the ticker symbols to deliver ticks for.
+        """
+        self.symbols = list(dict.fromkeys(t for t in ticker_symbols if t))
+
+    def start(self, stream: "QuoteStream") -> None:
+        self.stream = stream
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name=type(self).__name__, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def run(self) -> None:
+        """Deliver ticks until stop() is called, runs in the adapter thread."""
+        raise NotImplementedError
+
+
+class PollingAdapter(QuoteAdapter):
+    """
+    Polls the bulk quotes of all subscribed symbols every interval seconds with background priority.
+    Only quotes with a new market time or price become ticks.
+    """
+
+    def __init__(self, interval: float = 15.0) -> None:
+        """
+        Args:
+            interval (float): Seconds between two polls.
+        """
+        super().__init__()
+        self.interval = interval
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            symbols = self.symbols
+            if symbols:
+                try:
+                    with priority(PRIORITY_BACKGROUND):
+                        quotes = market_data.get_provider().quotes(symbols)
+                    self.deliver(quotes)
+                except Exception as e:
+                    print(f"Warning: Quote polling failed: {e}")
+            self.stop_event.wait(self.interval)
+
+    def deliver(self, quotes: dict) -> None:
+        """
+        Turn a bulk quote answer into ticks.
+
+        Args:
+            quotes (dict): ticker_symbol -> quote dict as returned by MarketDataProvider.quotes.
+        """
+        for ticker_symbol, quote in quotes.items():
+            if not isinstance(quote, dict) or quote.get('regularMarketPrice') is None:
+                continue
+            market_time = quote.get('regularMarketTime')
+            try:
+                timestamp = float(market_time)
+            except (TypeError, ValueError):
+                try:
+                    timestamp = pd.Timestamp(market_time).timestamp()
+                except Exception:
+                    timestamp = time.time()
+            self.stream.emit(ticker_symbol, timestamp, float(quote['regularMarketPrice']),
+                             quote.get('regularMarketVolume'), quote.get('currency'))
+
+
+class SimulatedAdapter(QuoteAdapter):
+    """
+    Local random walk for tests and demos, no network access.
+    """
+
+    def __init__(self, interval: float = 1.0, start_prices: dict | None = None, volatility: float = 0.001,
+                 seed: int | None = None, currency: str = "EUR") -> None:
+        """
+        Args:
+            interval (float): Seconds between two ticks of every symbol.
+            start_prices (dict or None): ticker_symbol -> first price, other symbols start at 100.
+            volatility (float): Standard deviation of the relative price change per tick.
+            seed (int or None): Seed of the random generator for reproducible runs.
+            currency (str): Currency of the simulated quotes.
+        """
+        super().__init__()
+        self.interval = interval
+        self.prices = dict(start_prices or {})
+        self.volumes: dict[str, float] = {}
+        self.volatility = volatility
+        self.random = random.Random(seed)
+        self.currency = currency
+
+    def step(self, timestamp: float | None = None) -> None:
+        """
+        Emit one tick for every subscribed symbol.
+
+        Args:
+            timestamp (float or None): Time of the ticks, None for now.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        for ticker_symbol in self.symbols:
+            price = self.prices.get(ticker_symbol, 100.0) * (1 + self.random.gauss(0, self.volatility))
+            self.prices[ticker_symbol] = price
+            self.volumes[ticker_symbol] = self.volumes.get(ticker_symbol, 0.0) + self.random.randint(0, 1000)
+            self.stream.emit(ticker_symbol, timestamp, price, self.volumes[ticker_symbol], self.currency)
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            self.step()
+            self.stop_event.wait(self.interval)
+
+
+class QuoteStream:
+    """
+    Collects the ticks of an adapter in one TickBuffer per ticker and informs listeners.
+    Listeners are called in the adapter thread, GUI code has to hand over to the Tk thread.
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        """
+        Args:
+            capacity (int): Ticks kept per ticker.
+        """
+        self.capacity = capacity
+        self.buffers: dict[str, TickBuffer] = {}
+        self.currencies: dict[str, str] = {}
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.adapter: QuoteAdapter | None = None
+
+    def add_listener(self, func) -> None:
+        """
+        Args:
+            func: Called as func(ticker_symbol, timestamp, price, volume, currency) for every new tick.
+        """
+        self.listeners.append(func)
+
+    def start(self, adapter: QuoteAdapter, ticker_symbols) -> None:
+        """
+        Stop the running adapter and start delivering ticks of ticker_symbols from adapter.
+
+        Args:
+            adapter (QuoteAdapter): The tick source.
+            ticker_symbols: Iterable of ticker symbols.
+        """
+        self.stop()
+        adapter.subscribe(ticker_symbols)
+        self.adapter = adapter
+        adapter.start(self)
+
+    def subscribe(self, ticker_symbols) -> None:
+        """
+        Change the ticker symbols of the running adapter.
+
+        Args:
+            ticker_symbols: Iterable of ticker symbols.
+        """
+        if self.adapter is not None:
+            self.adapter.subscribe(ticker_symbols)
+
+    def stop(self) -> None:
+        if self.adapter is not None:
+            self.adapter.stop()
+            self.adapter = None
+
+    def emit(self, ticker_symbol: str, timestamp: float, price: float, volume: float | None = None,
+             currency: str | None = None) -> bool:
+        """
+        Add a tick, called by the adapters. Ticks that are not newer than the last one of the ticker
+        and repeat its price are dropped.
+
+        Returns:
+            bool: True if the tick was added.
+        """
+        with self.lock:
+            buffer = self.buffers.get(ticker_symbol)
+            if buffer is None:
+                buffer = self.buffers[ticker_symbol] = TickBuffer(self.capacity)
+            last = buffer.last()
+            if last is not None and (timestamp < last[0] or (timestamp == last[0] and price == last[1])):
+                return False
+            buffer.append(timestamp, price, volume)
+            if currency:
+                self.currencies[ticker_symbol] = currency
+        for listener in self.listeners:
+            try:
+                listener(ticker_symbol, timestamp, price, volume, currency or self.currencies.get(ticker_symbol))
+            except Exception as e:
+                print(f"Error: Quote listener failed for {ticker_symbol}: {e}")
+        return True
+
+    def latest(self, ticker_symbol: str) -> tuple | None:
+        """
+        Returns:
+            tuple or None: (time, price, volume) of the newest tick of the ticker, None if there is none.
+        """
+        with self.lock:
+            buffer = self.buffers.get(ticker_symbol)
+            return buffer.last() if buffer is not None else None
+
+    def ticks(self, ticker_symbol: str, since: float | None = None) -> tuple:
+        """
+        Args:
+            ticker_symbol (str): The ticker symbol.
+            since (float or None): Only ticks later than this time (seconds since the epoch).
+
+        Returns:
+            tuple: (times, prices, volumes) NumPy arrays, oldest first.
+        """
+        with self.lock:
+            buffer = self.buffers.get(ticker_symbol)
+            if buffer is None:
+                return np.zeros(0), np.zeros(0), np.zeros(0)
+            return buffer.since(since)
+
+
+def create_adapter(name: str) -> QuoteAdapter | None:
+    """
+    Args:
+        name (str): "poll", "simulate" or "off".
+
+    Returns:
+        QuoteAdapter or None: The adapter, None for "off".
+    """
+    if name == "off":
+        return None
+    if name == "simulate":
+        return SimulatedAdapter()
+    if name != "poll":
+        print(f"Warning: Unknown quote stream '{name}', using 'poll'")
+    return PollingAdapter()
+
+
+QUOTE_STREAM = QuoteStream()
@@ -1,36 +1,49 @@
 
 import stockdata
+from fetch_engine import ENGINE
 
 def sektor_report(eigene_ticker_liste):
     """
     Erstellt einen Bericht, der eigene Aktien nach Sektoren gruppiert und für jeden Sektor
     3 weitere Peer-Aktien hinzufügt.
 
+    Wartet, bis alle Abfragen fertig sind, und blockiert daher; aus der GUI nur in einem
+    Hintergrund-Thread aufrufen (siehe tools.GUI_QUEUE.run_in_background).
+
     :param eigene_ticker_liste: Liste eigener Aktien-Ticker
     :return: Dictionary mit Sektoren als Keys und Ticker-Listen als Values
     """
     # Schritt 1: Eigene Aktien nach Sektor gruppieren
     sector_dict = {}  # z.B. {'Technology': {'AAPL': {}, 'MSFT': {}}, ...}
+    sector_futures = {ticker: ENGINE.submit(stockdata.get_industry_and_sector, ticker)
+                      for ticker in dict.fromkeys(eigene_ticker_liste)}
     for ticker in eigene_ticker_liste:
-        sector = stockdata.get_industry_and_sector(ticker)[1]  # Index 1 ist der Sektor
+        sector = sector_futures[ticker].result()[1]  # Index 1 ist der Sektor
         if sector not in sector_dict:
             sector_dict[sector] = {}
         sector_dict[sector][ticker] = {}
 
     # schritt 2: füge peers hinzu
+    peer_futures = {sector: ENGINE.submit(stockdata.get_peers_for_sector, sector,
+                                          exclude=list(sector_dict[sector].keys()), count=3)
+                    for sector in sector_dict}
     for sector in sector_dict:
-        peer_tickers = stockdata.get_peers_for_sector(sector, exclude=list(sector_dict[sector].keys()), count=3)
+        peer_tickers = peer_futures[sector].result()
         for peer in peer_tickers:
             if peer not in sector_dict[sector]:
                 sector_dict[sector][peer] = {}
 
-    # Schritt 3: Hole zusätzliche Daten für alle Ticker
+    # Schritt 3: Hole zusätzliche Daten für alle Ticker, parallel
+    all_tickers = [ticker for sector in sector_dict for ticker in sector_dict[sector]]
+    info_futures = {ticker: stockdata.get_ticker_fields_future(ticker, ('fiftyTwoWeekHigh', 'fiftyTwoWeekLow',
+                                                                        'trailingPE', 'forwardPE', 'marketCap'))
+                    for ticker in dict.fromkeys(all_tickers)}
+    day_data_futures = {ticker: stockdata.get_stock_day_data_future(ticker) for ticker in dict.fromkeys(all_tickers)}
     for sector in sector_dict:
         for ticker, data in sector_dict[sector].items():
             # Hole weitere Kennzahlen für Peer-Vergleich
             try:
-                ticker_obj = stockdata.yf.Ticker(ticker)
-                info = ticker_obj.info
+                info = info_futures[ticker].result()
                 data['fiftyTwoWeekHigh'] = info.get('fiftyTwoWeekHigh')
                 data['fiftyTwoWeekLow'] = info.get('fiftyTwoWeekLow')
                 data['trailingPE'] = info.get('trailingPE')
@@ -43,7 +56,10 @@ def sektor_report(eigene_ticker_liste):
                 data['forwardPE'] = None
                 data['marketCap'] = None
             # Hole aktuellen Kurs
-            day_data = stockdata.get_stock_day_data(ticker)
+            try:
+                day_data = day_data_futures[ticker].result()
+            except Exception:
+                day_data = None
             if day_data:
                 data['current_price'] = day_data.get('current_price')
                 data['currency'] = day_data.get('currency')
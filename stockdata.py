@@ -1,8 +1,16 @@
-from tools import timed_cache, persistent_cache, persistent_timed_cache
-
-import yfinance as yf
-import yahooquery
+from tools import timed_cache, persistent_cache, persistent_timed_cache, revalidate_in_background
+from history_store import HISTORY, downsample_history, slice_history
+from ticker_snapshot import TICKER_SNAPSHOTS
+from dividend_store import DIVIDENDS
+from quote_stream import QUOTE_STREAM, append_ticks
+from fetch_engine import ENGINE
+import market_data
+
+import os
+import time
+import threading
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 
 # doctest: +ELLIPSIS
@@ -27,13 +35,118 @@ along with this program. If not, see <https://www.gnu.org/licenses/>.
 """ 
 This module provides functions to fetch stock data, currency exchange rates, and ticker symbols
 using Yahoo Finance APIs and yahooquery. All functions are cached for performance.
+The requests go through the provider selected in market_data.
 """
 
 
-@timed_cache(ttl_seconds=300)  # 5 minutes cache
+PRICE_FIELDS = ('regularMarketPrice', 'currency')
+PRICE_FIELDS_EXTENDED = PRICE_FIELDS + ('regularMarketChangePercent', 'marketCap', 'fiftyTwoWeekHigh', 'fiftyTwoWeekLow')
+DAY_DATA_FIELDS = ('regularMarketOpen', 'regularMarketDayHigh', 'regularMarketDayLow', 'regularMarketPrice',
+                   'regularMarketVolume', 'regularMarketChangePercent', 'dividendYield', 'currency',
+                   'trailingPE', 'forwardPE', 'marketCap')
+
+
+def get_ticker_fields(ticker_symbol: str, fields) -> dict:
+    """
+    Get fields of yfinance's Ticker.info from the shared ticker snapshot.
+    The snapshot is fetched again only if it is older than the freshness class
+    (static, daily, intraday) of one of the requested fields allows.
+
+    Args:
+        ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL' for Apple Inc.).
+        fields: Iterable of Ticker.info field names (e.g. 'sector', 'trailingPE').
+
+    Returns:
+        dict: field -> value (None if not available).
+
+    Example:
+        >>> get_ticker_fields("AAPL", ("sector",))
+        {'sector': 'Technology'}
+    """
+    return TICKER_SNAPSHOTS.get_fields(ticker_symbol, fields)
+
+
+FX_CURRENCIES = {"USD"}  # Währungen im FX-Snapshot, wächst mit jeder neu angefragten Währung
+_FX_SUBUNITS = {"GBp": ("GBP", 100), "GBX": ("GBP", 100), "ZAc": ("ZAR", 100), "ILA": ("ILS", 100)}
+
+
+@timed_cache(ttl_seconds=300, max_entries=1)  # 5 minutes cache
+def get_fx_snapshot() -> dict:
+    """
+    Fetch the exchange rates of all currencies in FX_CURRENCIES to Euro with one batched request,
+    so all positions are converted with rates of the same moment.
+
+    Returns:
+        dict: {'timestamp': float, 'rates': {currency: value of 1 unit in EUR}}.
+            'EUR' is always 1.0; currencies Yahoo Finance could not resolve are missing.
+    """
+    currencies = sorted(FX_CURRENCIES - {"EUR"})
+    symbols = [f'EUR{currency}=X' for currency in currencies]
+    rates = {"EUR": 1.0}
+    try:
+        prices = market_data.get_provider().price(symbols) if symbols else {}
+        for currency, symbol in zip(currencies, symbols):
+            quote = prices.get(symbol, {}) if isinstance(prices, dict) else {}
+            rate = quote.get("regularMarketPrice", None) if isinstance(quote, dict) else None
+            if rate:
+                # EUR/USD -> 1 EUR = rate USD, so 1 USD = 1/rate EUR
+                rates[currency] = round(1 / rate, 8)
+    except Exception as e:
+        print(f"Error: Could not fetch exchange rates for {', '.join(currencies)}")
+        print(e)
+    return {'timestamp': time.time(), 'rates': rates}
+
+
+def get_fx_rates(currencies) -> dict:
+    """
+    Get the rates to Euro of the given currencies from one consistent snapshot.
+    Unknown currencies are added to the snapshot, which is then fetched again in one request.
+    Sub-units like GBp (pence) are converted through their main currency.
+
+    Args:
+        currencies: Iterable of currency codes.
+
+    Returns:
+        dict: currency -> value of 1 unit in EUR, or None if unavailable.
+    """
+    currencies = {currency for currency in currencies if currency}
+    base_currencies = {_FX_SUBUNITS.get(currency, (currency, 1))[0] for currency in currencies}
+    if not base_currencies <= FX_CURRENCIES | {"EUR"}:
+        FX_CURRENCIES.update(base_currencies - {"EUR"})
+        get_fx_snapshot.cache_clear()
+    rates = get_fx_snapshot()['rates']
+    result = {}
+    for currency in currencies:
+        base, divisor = _FX_SUBUNITS.get(currency, (currency, 1))
+        rate = rates.get(base)
+        result[currency] = rate / divisor if rate is not None else None
+    return result
+
+
+def get_cross_rate(from_currency: str, to_currency: str) -> float | None:
+    """
+    Get the exchange rate between two currencies via their Euro rates of the same snapshot.
+
+    Args:
+        from_currency (str): The currency code to convert from.
+        to_currency (str): The currency code to convert to.
+
+    Returns:
+        float: Value of 1 unit of from_currency in to_currency, or None if unavailable.
+
+    Example:
+        >>> 0.5 < get_cross_rate("USD", "CHF") < 2.0
+        True
+    """
+    rates = get_fx_rates([from_currency, to_currency])
+    if rates.get(from_currency) is None or not rates.get(to_currency):
+        return None
+    return rates[from_currency] / rates[to_currency]
+
+
 def get_currency_to_eur_rate(from_currency: str = "USD") -> float | None:
     """
-    Fetch the current exchange rate from the given currency to Euro using Yahoo Finance.
+    Get the current exchange rate from the given currency to Euro (see get_fx_rates).
 
     Args:
         from_currency (str): The currency code to convert from (default: "USD").
@@ -47,21 +160,10 @@ def get_currency_to_eur_rate(from_currency: str = "USD") -> float | None:
         >>> get_currency_to_eur_rate("USD") < 2.0
         True
     """
-    try:
-        fx = yahooquery.Ticker(f'EUR{from_currency}=X')
-        rate = fx.price.get(f"EUR{from_currency}=X", {}).get("regularMarketPrice", None)
-        if rate:
-            # EUR/USD -> 1 EUR = rate USD, so 1 USD = 1/rate EUR
-            return round(1 / rate, 4)
-        else:
-            return None
-    except Exception as e:
-        print(f"Error: Could not fetch {from_currency}/EUR exchange rate")
-        print(e)
-        return None
+    return get_fx_rates([from_currency]).get(from_currency)
 
 
-@timed_cache(ttl_seconds=300)  # 5 minutes cache
+@timed_cache(ttl_seconds=300, max_entries=1024, stale_while_revalidate=3600)  # 5 minutes cache, 1 hour stale
 def get_stock_price(ticker_symbol: str, extended: bool = False) -> tuple:
     """
     Fetch the current stock price for the given ticker symbol using yfinance.
@@ -91,8 +193,7 @@ def get_stock_price(ticker_symbol: str, extended: bool = False) -> tuple:
         True
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        stock_info = ticker.info
+        stock_info = get_ticker_fields(ticker_symbol, PRICE_FIELDS if not extended else PRICE_FIELDS_EXTENDED)
         current_price = stock_info.get('regularMarketPrice', None)
         currency = stock_info.get('currency', None)
         regularMarketChangePercent = stock_info.get('regularMarketChangePercent', None)
@@ -116,6 +217,114 @@ def get_stock_price(ticker_symbol: str, extended: bool = False) -> tuple:
         else:
             return None, None, None
 
+
+def apply_quote_tick(ticker_symbol: str, timestamp: float, price: float, volume: float | None = None,
+                     currency: str | None = None) -> None:
+    """
+    Store a price from the quote stream in the get_stock_price cache, so the next price lookup
+    shows it without a request. Listener for quote_stream.QUOTE_STREAM.
+
+    Args:
+        ticker_symbol (str): The stock ticker symbol.
+        timestamp (float): Time of the quote in seconds since the epoch.
+        price (float): The streamed price.
+        volume (float or None): Accumulated volume of the day (unused).
+        currency (str or None): Currency of the price; ticks without currency are ignored.
+    """
+    if currency is None:
+        return
+    rate = get_fx_rates([currency]).get(currency) if currency != "EUR" else None
+    get_stock_price.cache_put((price, currency, rate), ticker_symbol)
+
+
+QUOTE_BATCH_SIZE = 200  # Symbole pro Quote-Request
+
+
+def _fetch_quotes(ticker_symbols: list[str]) -> None:
+    """
+    Fetch the quotes of ticker_symbols with bulk requests and store them in the get_stock_price cache
+    (plain and extended tuples).
+    """
+    for start in range(0, len(ticker_symbols), QUOTE_BATCH_SIZE):
+        batch = ticker_symbols[start:start + QUOTE_BATCH_SIZE]
+        try:
+            quotes = market_data.get_provider().quotes(batch)
+        except Exception as e:
+            print(f"Error: Could not fetch quotes for {len(batch)} ticker symbols")
+            print(e)
+            continue
+        if not isinstance(quotes, dict):
+            continue
+        fx_rates = get_fx_rates(quote.get('currency') for quote in quotes.values() if isinstance(quote, dict))
+        for ticker_symbol in batch:
+            quote = quotes.get(ticker_symbol)
+            if not isinstance(quote, dict):
+                continue
+            current_price = quote.get('regularMarketPrice', None)
+            currency = quote.get('currency', None)
+            rate = None
+            if current_price is not None and currency != "EUR":
+                rate = fx_rates.get(currency)
+            get_stock_price.cache_put((current_price, currency, rate), ticker_symbol)
+            get_stock_price.cache_put((current_price, currency, rate,
+                                       quote.get('regularMarketChangePercent', None),
+                                       quote.get('marketCap', None),
+                                       quote.get('fiftyTwoWeekHigh', None),
+                                       quote.get('fiftyTwoWeekLow', None)), ticker_symbol, True)
+
+
+# laufende Hintergrund-Aktualisierungen veralteter Kurse
+_quotes_refreshing = set()
+_quotes_refresh_lock = threading.Lock()
+
+
+def get_stock_prices(ticker_symbols: list[str], extended: bool = False) -> dict:
+    """
+    Fetch the current stock prices of many ticker symbols with one bulk quote request.
+    The results are also stored in the get_stock_price cache, so later single calls are cache hits.
+    Only symbols without a cached price are requested while the caller waits. Prices within the
+    stale_while_revalidate window of get_stock_price are returned as they are and refreshed with one
+    bulk request in the background (see tools.add_refresh_listener). Symbols missing in the bulk
+    answer fall back to get_stock_price.
+
+    Args:
+        ticker_symbols (list[str]): The stock ticker symbols.
+        extended (bool, optional): Return the extended tuples, see get_stock_price.
+
+    Returns:
+        dict: ticker_symbol -> tuple as returned by get_stock_price(ticker_symbol, extended).
+
+    Example:
+        >>> prices = get_stock_prices(["AAPL", "MSFT"])
+        >>> prices["AAPL"] == get_stock_price("AAPL")
+        True
+    """
+    ticker_symbols = list(dict.fromkeys(ticker_symbols))
+    key_args = (True,) if extended else ()
+    cached = {t: get_stock_price.cache_peek(t, *key_args) for t in ticker_symbols if t}
+    missing = [t for t, (state, _) in cached.items() if state is None]
+    stale = [t for t, (state, _) in cached.items() if state == 'stale']
+    stats = get_stock_price.cache_stats
+    if missing:
+        stats.count('misses', len(missing))
+        _fetch_quotes(missing)
+    if stale:
+        def refresh():
+            stats.count('refreshes', len(stale))
+            _fetch_quotes(stale)
+
+        revalidate_in_background(get_stock_prices, (stale,), {'extended': extended}, _quotes_refreshing,
+                                 _quotes_refresh_lock, (tuple(stale), extended), refresh)
+    prices = {}
+    for t in ticker_symbols:
+        state, result = cached.get(t, (None, None))
+        if state == 'stale':
+            stats.count('stale')
+            prices[t] = result
+        else:
+            prices[t] = get_stock_price(t, *key_args)
+    return prices
+
 @persistent_cache("get_industry_and_sector.json")
 def get_industry_and_sector(ticker_symbol: str) -> list[str | None]:
     """
@@ -134,8 +343,7 @@ def get_industry_and_sector(ticker_symbol: str) -> list[str | None]:
         ['Consumer Electronics', 'Technology']
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        stock_info = ticker.info
+        stock_info = get_ticker_fields(ticker_symbol, ('industry', 'sector'))
         industry = stock_info.get('industry', None)
         sector = stock_info.get('sector', None)
         return [industry, sector]
@@ -164,7 +372,7 @@ def get_peers_for_sector(sector: str, exclude: list[str] = [], count: int = 3) -
     """
     try:
         # Suche nach Unternehmen im angegebenen Sektor
-        search = yahooquery.search(sector)
+        search = market_data.get_provider().search(sector)
         peers = []
         if search and 'quotes' in search and len(search['quotes']) > 0:
             for quote in search['quotes']:
@@ -195,7 +403,7 @@ def get_ticker_symbols_from_name(company_name: str) -> list[str] | None:
         True
     """
     try:
-        search = yahooquery.search(company_name)
+        search = market_data.get_provider().search(company_name)
         if search and 'quotes' in search and len(search['quotes']) > 0:
             symbols = [quote['symbol'] for quote in search['quotes'] if 'symbol' in quote]
             return symbols
@@ -221,7 +429,7 @@ def get_ticker_symbol_name_from_isin(isin: str) -> str | None:
         'AAPL'
     """
     try:
-        search = yahooquery.search(isin)
+        search = market_data.get_provider().search(isin)
         if search and 'quotes' in search and len(search['quotes']) > 0:
             for quote in search['quotes']:
                 if 'symbol' in quote and quote['symbol']:
@@ -246,13 +454,11 @@ def get_stock_company_name(ticker_symbol: str) -> str | None:
         'Apple Inc.'
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        stock_info = ticker.info
-        return stock_info.get('longName', None)
+        return get_ticker_fields(ticker_symbol, ('longName',))['longName']
     except Exception as _:
         return None
 
-@timed_cache(ttl_seconds=300)  # 5 minutes cache for day data
+@timed_cache(ttl_seconds=300, max_entries=512)  # 5 minutes cache for day data
 def get_stock_day_data(ticker_symbol: str) -> dict | None:
     """
     Fetch the current day's stock data for the given ticker symbol using yfinance.
@@ -266,8 +472,7 @@ def get_stock_day_data(ticker_symbol: str) -> dict | None:
                           last_dividend, next_ex_date, frequency, last_dividends
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
+        info = get_ticker_fields(ticker_symbol, DAY_DATA_FIELDS)
 
         day_data = {
             'open': info.get('regularMarketOpen'),
@@ -299,115 +504,91 @@ def get_stock_day_data(ticker_symbol: str) -> dict | None:
         return None
 
 
-@persistent_timed_cache("get_stock_year_data.json", ttl_seconds=72000)  # 20 hours cache for year data
-def get_stock_year_data(ticker_symbol: str) -> dict | None:
+# Zeitraum der Charts -> (Intervall der Bars, Beginn relativ zum letzten Bar; "session" = letzter Handelstag)
+CHART_TIMESPANS = {
+    "All": ("1d", None),
+    "Year": ("1d", pd.DateOffset(years=1)),
+    "Month": ("1d", pd.DateOffset(months=1)),
+    "Day": ("5m", "session"),
+}
+# ersetzt durch history_store, alte Cache-Dateien werden entfernt
+_OBSOLETE_HISTORY_CACHES = ("get_stock_year_data", "get_stock_month_data", "get_stock_all_data",
+                            "get_dividend_info")
+
+
+def get_stock_history(ticker_symbol: str, timespan: str = "Year", max_points: int | None = None) -> dict | None:
     """
-    Fetch the last year's stock data for the given ticker symbol using yfinance.
+    Get the chart data of a ticker for one of the CHART_TIMESPANS.
+    All daily timespans are slices of the same locally stored history, so switching between them
+    needs no download; "Day" uses the intraday history of the last trading session, extended with
+    the ticks of the quote stream since the last bar.
 
     Args:
         ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL' for Apple Inc.).
+        timespan (str): "All", "Year", "Month" or "Day".
+        max_points (int or None): Downsample to at most this many bars (see downsample_history).
 
     Returns:
         dict: Dictionary with historical data or None on error.
-            Contains keys: dates, prices, volumes
+            Contains keys: dates (DatetimeIndex), prices, volumes, opens, highs, lows (NumPy arrays)
     """
-    try:
-        ticker = yf.Ticker(ticker_symbol)
-        hist = ticker.history(period="1y")
-        
-        if hist.empty:
-            return None
-            
-        # Convert to lists for easy plotting
-        year_data = {
-            'dates': hist.index.tolist(),
-            'prices': hist['Close'].tolist(),
-            'volumes': hist['Volume'].tolist(),
-            'opens': hist['Open'].tolist(),
-            'highs': hist['High'].tolist(),
-            'lows': hist['Low'].tolist()
-        }
-        
-        return year_data
-    except Exception as e:
-        print(f"Error: Could not fetch year data for {ticker_symbol}: {e}")
+    interval, span = CHART_TIMESPANS[timespan]
+    data = HISTORY.get_history(ticker_symbol, interval)
+    if data is None:
         return None
+    if span == "session":
+        data = slice_history(data, data['dates'][-1].normalize())
+        data = append_ticks(data, *QUOTE_STREAM.ticks(ticker_symbol, data['dates'][-1].timestamp()))
+    elif span is not None:
+        data = slice_history(data, pd.Timestamp.now() - span)
+    return downsample_history(data, max_points)
+
+
+def get_stock_year_data(ticker_symbol: str) -> dict | None:
+    """
+    Get the last year's stock data for the given ticker symbol (see get_stock_history).
+
+    Args:
+        ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL' for Apple Inc.).
+
+    Returns:
+        dict: Dictionary with historical data or None on error.
+            Contains keys: dates (DatetimeIndex), prices, volumes, opens, highs, lows (NumPy arrays)
+    """
+    return get_stock_history(ticker_symbol, "Year")
 
 
-@persistent_timed_cache("get_stock_month_data.json", ttl_seconds=3600)  # 1 hour cache for month data
 def get_stock_month_data(ticker_symbol: str) -> dict | None:
     """
-    Fetch the last month's stock data for the given ticker symbol using yfinance.
+    Get the last month's stock data for the given ticker symbol (see get_stock_history).
 
     Args:
         ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL' for Apple Inc.).
 
     Returns:
         dict: Dictionary with historical data or None on error.
-            Contains keys: dates, prices, volumes
+            Contains keys: dates (DatetimeIndex), prices, volumes, opens, highs, lows (NumPy arrays)
     """
-    try:
-        ticker = yf.Ticker(ticker_symbol)
-        hist = ticker.history(period="1mo")
-        
-        if hist.empty:
-            return None
-            
-        # Convert to lists for easy plotting
-        month_data = {
-            'dates': hist.index.tolist(),
-            'prices': hist['Close'].tolist(),
-            'volumes': hist['Volume'].tolist(),
-            'opens': hist['Open'].tolist(),
-            'highs': hist['High'].tolist(),
-            'lows': hist['Low'].tolist()
-        }
-        
-        return month_data
-    except Exception as e:
-        print(f"Error: Could not fetch month data for {ticker_symbol}: {e}")
-        return None
+    return get_stock_history(ticker_symbol, "Month")
 
 
-@persistent_timed_cache("get_stock_all_data.json", ttl_seconds=72000)  # 20 hours cache for all data
 def get_stock_all_data(ticker_symbol: str) -> dict | None:
     """
-    Fetch all available stock data for the given ticker symbol using yfinance.
+    Get all available stock data for the given ticker symbol (see get_stock_history).
 
     Args:
         ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL' for Apple Inc.).
 
     Returns:
         dict: Dictionary with historical data or None on error.
-            Contains keys: dates, prices, volumes
+            Contains keys: dates (DatetimeIndex), prices, volumes, opens, highs, lows (NumPy arrays)
     """
-    try:
-        ticker = yf.Ticker(ticker_symbol)
-        hist = ticker.history(period="max")
-        
-        if hist.empty:
-            return None
-            
-        # Convert to lists for easy plotting
-        all_data = {
-            'dates': hist.index.tolist(),
-            'prices': hist['Close'].tolist(),
-            'volumes': hist['Volume'].tolist(),
-            'opens': hist['Open'].tolist(),
-            'highs': hist['High'].tolist(),
-            'lows': hist['Low'].tolist()
-        }
-        
-        return all_data
-    except Exception as e:
-        print(f"Error: Could not fetch all data for {ticker_symbol}: {e}")
-        return None
+    return get_stock_history(ticker_symbol, "All")
 
 
-@timed_cache(ttl_seconds=60)  # 1 minute cache for day data (non-persistent)
 def get_stock_day_chart_data(ticker_symbol: str) -> dict | None:
     """
-    Fetch the current day's intraday stock data for the given ticker symbol using yfinance.
+    Get the intraday stock data (5 minute bars) of the last trading session for the given ticker symbol.
     This is different from get_stock_day_data which returns summary info.
 
     Args:
@@ -415,111 +596,124 @@ def get_stock_day_chart_data(ticker_symbol: str) -> dict | None:
 
     Returns:
         dict: Dictionary with intraday data or None on error.
-            Contains keys: dates, prices, volumes
+            Contains keys: dates (DatetimeIndex), prices, volumes, opens, highs, lows (NumPy arrays)
     """
-    try:
-        ticker = yf.Ticker(ticker_symbol)
-        hist = ticker.history(period="1d", interval="5m")
-        
-        if hist.empty:
-            return None
-            
-        # Convert to lists for easy plotting
-        day_chart_data = {
-            'dates': hist.index.tolist(),
-            'prices': hist['Close'].tolist(),
-            'volumes': hist['Volume'].tolist(),
-            'opens': hist['Open'].tolist(),
-            'highs': hist['High'].tolist(),
-            'lows': hist['Low'].tolist()
-        }
-        
-        return day_chart_data
-    except Exception as e:
-        print(f"Error: Could not fetch day chart data for {ticker_symbol}: {e}")
-        return None
+    return get_stock_history(ticker_symbol, "Day")
 
 
-@persistent_timed_cache("get_dividend_info.json", ttl_seconds=604800)  # 7 Tage Cache
+def remove_obsolete_history_caches() -> None:
+    """
+    Delete the cache files of the former separate year/month/all history caches and of the former
+    dividend info cache, whose data now lives in history_store and dividend_store.
+    """
+    for name in _OBSOLETE_HISTORY_CACHES:
+        for path in (f"{name}.json", f"{name}.sqlite", f"{name}.sqlite-wal", f"{name}.sqlite-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+# Mittlerer Abstand der letzten Ausschüttungen in Tagen (obere Grenze) -> Auszahlungshäufigkeit
+DIVIDEND_FREQUENCIES = (
+    (40, "Monatlich"),  # 30 + 10 Puffer
+    (100, "Quartalsweise"),  # 3 * 30 + 10 Puffer
+    (190, "Halbjährlich"),  # 6 * 30 + 10 Puffer
+    (np.inf, "Jährlich"),
+)
+
+
+def dividend_statistics(divs: pd.Series, price: float | None = None) -> dict:
+    """
+    Berechnet Auszahlungshäufigkeit, voraussichtliches nächstes Ex-Datum und Rendite der letzten 4 Dividenden
+    vektorisiert aus den Dividendenereignissen.
+    Args:
+        divs (pd.Series): Beträge mit den Ex-Daten als DatetimeIndex.
+        price (float|None): Aktueller Kurs für die Rendite.
+    Returns:
+        dict: { 'last_dividend', 'frequency', 'projected_ex_date' (pd.Timestamp|None), 'last_dividends' }
+    Example:
+        >>> divs = pd.Series([0.5, 0.5, 0.6], index=pd.to_datetime(["2024-03-01", "2024-06-01", "2024-09-01"]))
+        >>> stats = dividend_statistics(divs, price=20.0)
+        >>> stats['frequency'], stats['projected_ex_date'].strftime('%Y-%m-%d')
+        ('Quartalsweise', '2024-12-02')
+        >>> [d['percent'] for d in stats['last_dividends']]
+        [3.0, 2.5, 2.5]
+    """
+    if divs is None or divs.empty:
+        return {'last_dividend': None, 'frequency': None, 'projected_ex_date': None, 'last_dividends': []}
+    divs = divs.sort_index()
+    dates = divs.index[-5:]
+    frequency = None
+    projected_ex_date = None
+    if len(dates) >= 2:
+        avg_days = np.diff(dates.to_numpy()).astype('timedelta64[s]').astype(float).mean() / 86400
+        frequency = DIVIDEND_FREQUENCIES[np.searchsorted([limit for limit, _ in DIVIDEND_FREQUENCIES],
+                                                         avg_days, side='right')][1]
+        projected_ex_date = dates[-1] + pd.Timedelta(days=round(avg_days))
+    # Letzte 4 Dividenden (Datum, Betrag, Rendite), neueste zuerst
+    last = divs.iloc[::-1].iloc[:4]
+    amounts = last.to_numpy(dtype=float)
+    percents = np.round(100 * amounts / price, 2) if price else np.full(len(amounts), np.nan)
+    percents = np.where(amounts > 0, percents, np.nan)
+    labels = last.index.strftime('%Y-%B')  # Format Datum: "2025-December"
+    last_dividends = [{'index': i + 1, 'date': label, 'amount': float(amount),
+                       'percent': None if np.isnan(percent) else float(percent)}
+                      for i, (label, amount, percent) in enumerate(zip(labels, amounts, percents))]
+    return {
+        'last_dividend': float(amounts[0]),
+        'frequency': frequency,
+        'projected_ex_date': projected_ex_date,
+        'last_dividends': last_dividends
+    }
+
+
+@timed_cache(ttl_seconds=300, max_entries=256)  # 5 minutes cache, die Ereignisse liegen in DIVIDENDS
 def get_dividend_info(ticker_symbol: str) -> dict | None:
     """
     Liefert Infos zur letzten Dividende, nächstem Ex-Dividenden-Datum, Auszahlungshäufigkeit und die letzten 4 Dividenden.
+    Die Dividendenereignisse kommen aus dem lokalen Dividendenspeicher, der nur neue Ereignisse nachlädt.
     Args:
         ticker_symbol (str): Das Tickersymbol (z.B. 'AAPL').
     Returns:
         dict: { 'last_dividend': float|None, 'next_ex_date': str|None, 'frequency': str|None, 'last_dividends': list }
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        divs = ticker.dividends
-        if divs is None or divs.empty:
+        divs = DIVIDENDS.get_events(ticker_symbol)
+        if divs.empty:
             return {'last_dividend': None, 'next_ex_date': None, 'frequency': None, 'last_dividends': []}
-        # Letzte Dividende
-        last_dividend = float(divs.iloc[-1]) if not divs.empty else None
-        # Auszahlungshäufigkeit berechnen
-        if len(divs) >= 2:
-            divs_sorted = divs.sort_index(ascending=False)
-            dates = divs_sorted.index[:5]
-            if len(dates) >= 2:
-                intervals = [(dates[i] - dates[i+1]).days for i in range(len(dates)-1)]
-                avg_days = sum(intervals) / len(intervals)
-                if avg_days < 40: # 30 + 10 Puffer
-                    frequency = "Monatlich"
-                elif avg_days < 100: # 3 * 30 + 10 Puffer
-                    frequency = "Quartalsweise"
-                elif avg_days < 190: # 6 * 30 + 10 Puffer
-                    frequency = "Halbjährlich"
-                else:
-                    frequency = "Jährlich"
-            else:
-                frequency = None
-        else:
-            frequency = None
-        # Nächstes Ex-Dividenden-Datum
-        cal = ticker.calendar
+        fields = get_ticker_fields(ticker_symbol, ('regularMarketPrice', 'exDividendDate'))
+        stats = dividend_statistics(divs, fields['regularMarketPrice'])
+        # Nächstes Ex-Dividenden-Datum: angekündigtes Datum, sonst aus dem mittleren Abstand hochgerechnet
+        today = pd.Timestamp.now().normalize()
         next_ex_date = None
-        if isinstance(cal, pd.DataFrame) and 'exDividendDate' in cal.index:
-            ex_date_val = cal.loc['exDividendDate'].values[0]
-            if pd.notnull(ex_date_val):
-                if isinstance(ex_date_val, (pd.Timestamp, datetime)):
-                    next_ex_date = ex_date_val.strftime('%Y-%m-%d')
-                else:
-                    try:
-                        next_ex_date = str(pd.to_datetime(ex_date_val).date())
-                    except Exception:
-                        next_ex_date = str(ex_date_val)
-        # Letzte 4 Dividenden (Datum, Betrag, Rendite)
-        last_dividends = []
-        currency = None
-        try:
-            currency = ticker.info.get('currency', None)
-        except Exception:
-            pass
-        price = ticker.info.get('regularMarketPrice', None)
-        for i, (date, amount) in enumerate(divs.sort_index(ascending=False).iloc[:4].items()):
-            # Berechne Dividendenrendite zum aktuellen Kurs (falls möglich)
-            percent = None
-            if price and amount:
-                percent = round(100 * amount / price, 2)
-            # Format Datum: "2025-December"
-            date_str = f"{date.year}-{date.strftime('%B')}"
-            last_dividends.append({
-                'index': i+1,
-                'date': date_str,
-                'amount': float(amount),
-                'percent': percent
-            })
+        if fields['exDividendDate']:
+            announced = pd.Timestamp(fields['exDividendDate'], unit='s')
+            if announced >= today:
+                next_ex_date = announced
+        if next_ex_date is None and stats['projected_ex_date'] is not None:
+            next_ex_date = stats['projected_ex_date']
+            if next_ex_date < today:
+                next_ex_date = None  # Ausschüttungen ausgesetzt oder Daten unvollständig
         return {
-            'last_dividend': last_dividend,
-            'next_ex_date': next_ex_date,
-            'frequency': frequency,
-            'last_dividends': last_dividends
+            'last_dividend': stats['last_dividend'],
+            'next_ex_date': next_ex_date.strftime('%Y-%m-%d') if next_ex_date is not None else None,
+            'frequency': stats['frequency'],
+            'last_dividends': stats['last_dividends']
         }
     except Exception as e:
         print(f"Error: Could not fetch dividend info for {ticker_symbol}: {e}")
         return {'last_dividend': None, 'next_ex_date': None, 'frequency': None, 'last_dividends': []}
 
 
+# Futures-Varianten für parallele Abfragen über viele Ticker (siehe fetch_engine.FetchEngine)
+get_stock_price_future = ENGINE.futures_variant(get_stock_price)
+get_industry_and_sector_future = ENGINE.futures_variant(get_industry_and_sector)
+get_stock_company_name_future = ENGINE.futures_variant(get_stock_company_name)
+get_stock_day_data_future = ENGINE.futures_variant(get_stock_day_data)
+get_stock_history_future = ENGINE.futures_variant(get_stock_history)
+get_dividend_info_future = ENGINE.futures_variant(get_dividend_info)
+get_ticker_fields_future = ENGINE.futures_variant(get_ticker_fields)
+
+
 if __name__ == "__main__":
     """
     Example calls for demonstration and manual testing.
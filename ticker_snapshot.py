@@ -0,0 +1,153 @@
+import time
+
+import tools
+import market_data
+
+"""
+This file is part of "The Portfolio".
+
+"The Portfolio"is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+"The Portfolio" is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+"""
+One shared snapshot of yfinance's Ticker.info per ticker. All stockdata functions read their
+fields from it, so opening a stock costs one quoteSummary request instead of one per function.
+"""
+
+# Maximales Alter in Sekunden je Aktualitätsklasse, None = ändert sich nie
+FRESHNESS_CLASSES = {
+    'static': None,
+    'daily': 86400,
+    'intraday': 300,
+}
+
+# Aktualitätsklasse je Feld, nicht aufgeführte Felder gelten als 'intraday'
+FIELD_FRESHNESS = {
+    'longName': 'static',
+    'shortName': 'static',
+    'sector': 'static',
+    'industry': 'static',
+    'currency': 'static',
+    'exchange': 'static',
+    'quoteType': 'static',
+    'trailingPE': 'daily',
+    'forwardPE': 'daily',
+    'dividendYield': 'daily',
+    'exDividendDate': 'daily',
+    'fiftyTwoWeekHigh': 'daily',
+    'fiftyTwoWeekLow': 'daily',
+    'regularMarketPrice': 'intraday',
+    'regularMarketOpen': 'intraday',
+    'regularMarketDayHigh': 'intraday',
+    'regularMarketDayLow': 'intraday',
+    'regularMarketVolume': 'intraday',
+    'regularMarketChangePercent': 'intraday',
+    'marketCap': 'intraday',
+}
+
+
+def max_age_of(fields) -> float | None:
+    """
+    Get the strictest maximum age of the freshness classes of the given fields.
+
+    Args:
+        fields: Iterable of Ticker.info field names.
+
+    Returns:
+        float or None: Maximum age in seconds, None if all fields are static.
+    """
+    ages = [FRESHNESS_CLASSES[FIELD_FRESHNESS.get(field, 'intraday')] for field in fields]
+    ages = [age for age in ages if age is not None]
+    return min(ages) if ages else None
+
+
+class TickerSnapshots:
+    """
+    Ticker.info snapshots of all tickers with their fetch time, kept in memory and in a CacheStore
+    so static and daily fields survive a restart. A snapshot is fetched again only if a caller asks
+    for a field whose freshness class it no longer satisfies.
+    """
+
+    def __init__(self, cache_file: str = "ticker_snapshot.json", hot_entries: int = 256) -> None:
+        """
+        Args:
+            cache_file (str): Name of the cache; the data is stored next to it as .sqlite.
+            hot_entries (int): Number of snapshots kept decoded in memory.
+        """
+        self.store = tools.CacheStore(cache_file)
+        self.hot = tools.HotCache(hot_entries)
+        self.stats = tools.CacheStats(self.get_fields, "persistent", FRESHNESS_CLASSES['intraday'], store=self.store)
+        self.flights = tools.SingleFlight(self.stats)
+
+    def get_fields(self, ticker_symbol: str, fields) -> dict:
+        """
+        Get fields of the Ticker.info of a ticker from a snapshot that is fresh enough for all of them.
+
+        Args:
+            ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL' for Apple Inc.).
+            fields: Iterable of Ticker.info field names.
+
+        Returns:
+            dict: field -> value (None if not available).
+        """
+        fields = tuple(fields)
+        info = self.get_info(ticker_symbol, max_age_of(fields))
+        return {field: info.get(field, None) for field in fields}
+
+    def get_info(self, ticker_symbol: str, max_age: float | None = FRESHNESS_CLASSES['intraday']) -> dict:
+        """
+        Get the whole Ticker.info of a ticker.
+
+        Args:
+            ticker_symbol (str): The stock ticker symbol (e.g., 'AAPL' for Apple Inc.).
+            max_age (float or None): Maximum age of the snapshot in seconds, None accepts any age.
+
+        Returns:
+            dict: The info dict, empty if it could not be fetched.
+        """
+        entry = self.hot.get(ticker_symbol)
+        if entry is None and ticker_symbol in self.store:
+            try:
+                entry = (self.store.load(ticker_symbol), self.store.timestamp(ticker_symbol), ticker_symbol)
+                self.hot.put(ticker_symbol, *entry)
+            except KeyError:
+                entry = None
+        if entry is not None and (max_age is None or (entry[1] is not None and time.time() - entry[1] < max_age)):
+            self.stats.count('hits')
+            return entry[0]
+        return self.flights.do(ticker_symbol, lambda: self._fetch(ticker_symbol, entry[0] if entry else {}))
+
+    def _fetch(self, ticker_symbol: str, old_info: dict) -> dict:
+        """
+        Fetch and store a new snapshot.
+
+        Returns:
+            dict: The new info dict, the old one if the request failed.
+        """
+        self.stats.count('misses')
+        start = time.perf_counter()
+        try:
+            info = market_data.get_provider().info(ticker_symbol)
+        except Exception as e:
+            print(f"Error: Could not fetch info for {ticker_symbol}: {e}")
+            return old_info
+        finally:
+            self.stats.record_latency(time.perf_counter() - start)
+        now = time.time()
+        self.store.store(ticker_symbol, info, now)
+        self.hot.put(ticker_symbol, info, now, ticker_symbol)
+        return info
+
+
+TICKER_SNAPSHOTS = TickerSnapshots()
@@ -1,9 +1,19 @@
 import os
+import sys
 import time
+import atexit
+import bisect
 import json
 import hashlib
+import sqlite3
+import tempfile
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 import tkinter as tk
+import numpy as np
 import pandas as pd
 
 
@@ -44,136 +54,1076 @@ path utilities, text wrapping, and tooltip support for tkinter widgets.
 """
 
 
+_COLUMNAR_MAGIC = b"PFC1"
+
+
+def _encode_columnar(value) -> bytes | str:
+    """
+    Serialize a dict of columns (e.g. OHLCV histories) into a compact binary payload.
+    DatetimeIndex and numeric NumPy array values are stored as raw little-endian buffers,
+    all other values go into a small JSON header. Non-dict values fall back to JSON text.
+
+    Args:
+        value: The value to serialize.
+
+    Returns:
+        bytes or str: Binary columnar payload, or JSON text for non-dict values.
+    """
+    if not isinstance(value, dict):
+        return json.dumps(value, default=_json_default)
+    columns, buffers, scalars, offset = [], [], {}, 0
+    for name, column in value.items():
+        if isinstance(column, pd.DatetimeIndex):
+            data = column.as_unit("ns").asi8.astype("<i8", copy=False)
+            entry = {"name": name, "kind": "datetime", "tz": str(column.tz) if column.tz is not None else None}
+        elif isinstance(column, np.ndarray) and column.dtype.kind in "biuf":
+            data = np.ascontiguousarray(column, dtype=column.dtype.newbyteorder("<"))
+            entry = {"name": name, "kind": "array"}
+        else:
+            scalars[name] = column
+            continue
+        entry.update(dtype=data.dtype.str, length=len(data), offset=offset)
+        columns.append(entry)
+        buffers.append(data.tobytes())
+        # Spalten auf 8 Byte ausrichten, damit sie ohne Kopie gelesen werden können
+        padding = -data.nbytes % 8
+        buffers.append(b"\0" * padding)
+        offset += data.nbytes + padding
+    header = json.dumps({"columns": columns, "scalars": scalars}, default=_json_default).encode()
+    header += b" " * (-len(header) % 8)
+    return b"".join([_COLUMNAR_MAGIC, len(header).to_bytes(4, "little"), header, *buffers])
+
+
+def _decode_payload(payload: bytes | str):
+    """
+    Deserialize a cache payload written as JSON text or by _encode_columnar.
+    Columnar arrays are read-only views on the payload (no copy, no per-value parsing).
+
+    Args:
+        payload (bytes or str): The stored payload.
+
+    Returns:
+        The cached value.
+    """
+    if isinstance(payload, bytes) and payload[:4] == _COLUMNAR_MAGIC:
+        header_length = int.from_bytes(payload[4:8], "little")
+        header = json.loads(payload[8:8 + header_length], object_hook=_json_object_hook)
+        base = 8 + header_length
+        value = dict(header["scalars"])
+        for column in header["columns"]:
+            data = np.frombuffer(payload, dtype=column["dtype"], count=column["length"],
+                                 offset=base + column["offset"])
+            if column["kind"] == "datetime":
+                dates = pd.DatetimeIndex(data.view("M8[ns]"))
+                if column["tz"] is not None:
+                    dates = dates.tz_localize("UTC").tz_convert(column["tz"])
+                value[column["name"]] = dates
+            else:
+                value[column["name"]] = data
+        return value
+    return json.loads(payload, object_hook=_json_object_hook)
+
+
+def atomic_write_json(path: str, data, **json_kwargs) -> None:
+    """
+    Write data as JSON to a temporary file next to path and atomically replace path with it.
+    A crash or a concurrent reader never sees a truncated file.
+
+    Args:
+        path (str): Target file.
+        data: JSON serializable data.
+        **json_kwargs: Passed on to json.dump (e.g. indent, default).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, **json_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+_CACHE_STORES: list["CacheStore"] = []
+
+
+def flush_cache_stores() -> None:
+    """
+    Write all buffered cache entries to disk. Called automatically at interpreter exit.
+    """
+    for store in list(_CACHE_STORES):
+        store.flush()
+
+
+atexit.register(flush_cache_stores)
+
+
+class CacheStore:
+    """
+    SQLite based key/value store backing the persistent caching decorators.
+    Only the key index (key -> timestamp) is kept in memory, payloads are read
+    from disk on demand and a cache miss writes just the new entry.
+    The store is opened lazily on first access, so creating it costs nothing at import time.
+    Payloads are JSON text, or binary columns (see _encode_columnar) if columnar is set.
+    New entries are buffered and written in one transaction at most every FLUSH_INTERVAL seconds
+    and at exit; SQLite runs in WAL mode, so a crash loses at most the unflushed entries but never
+    damages the stored ones.
+    """
+    FLUSH_INTERVAL = 5.0
+
+    def __init__(self, cache_file: str, timed: bool = False, ttl_seconds: int | None = None,
+                 columnar: bool = False) -> None:
+        """
+        Prepare the store for the given cache file without touching the disk.
+
+        Args:
+            cache_file (str): Path of the cache file, e.g. "get_stock_all_data.json".
+            timed (bool): True if the legacy JSON file stores {"result", "timestamp"} entries.
+            ttl_seconds (int or None): If set, expired entries are purged in a background thread after opening.
+            columnar (bool): Store dicts of arrays in the binary columnar format instead of JSON.
+        """
+        self.cache_file = cache_file
+        self.db_file = os.path.splitext(cache_file)[0] + ".sqlite"
+        self.timed = timed
+        self.ttl_seconds = ttl_seconds
+        self.columnar = columnar
+        self.lock = threading.RLock()
+        self.connection: sqlite3.Connection | None = None
+        self.index: dict[str, float | None] = {}
+        self.pending: dict[str, tuple[float | None, bytes | str]] = {}  # key -> (timestamp, payload), not yet on disk
+        self.flush_timer: threading.Timer | None = None
+        _CACHE_STORES.append(self)
+
+    def _connect(self) -> tuple[sqlite3.Connection, dict]:
+        """
+        Open the SQLite file and read the key index.
+
+        Returns:
+            tuple: (connection, index)
+
+        Raises:
+            sqlite3.DatabaseError: If the file is not a valid SQLite database.
+        """
+        connection = sqlite3.connect(self.db_file, check_same_thread=False)
+        try:
+            connection.execute('PRAGMA journal_mode = WAL;')
+            connection.execute('PRAGMA synchronous = NORMAL;')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    timestamp REAL,
+                    payload TEXT NOT NULL);''')
+            connection.commit()
+            index = dict(connection.execute('SELECT key, timestamp FROM cache;').fetchall())
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+        return connection, index
+
+    def _ensure_open(self) -> None:
+        """
+        Open the SQLite file, import a legacy JSON cache and load the key index on first use.
+        A damaged file is moved aside (*.corrupt) and the store starts empty.
+        """
+        if self.connection is not None:
+            return
+        with self.lock:
+            if self.connection is not None:
+                return
+            try:
+                connection, index = self._connect()
+            except sqlite3.DatabaseError as e:
+                print(f"Error: Cache file {self.db_file} is damaged and will be rebuilt: {e}")
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(self.db_file + suffix):
+                        os.replace(self.db_file + suffix, self.db_file + ".corrupt" + suffix)
+                connection, index = self._connect()
+            if self._import_legacy_json(connection):
+                index = dict(connection.execute('SELECT key, timestamp FROM cache;').fetchall())
+            self.index = index
+            self.connection = connection
+        if self.ttl_seconds is not None:
+            threading.Thread(target=self.purge_expired, args=(self.ttl_seconds,), daemon=True).start()
+
+    def _import_legacy_json(self, connection: sqlite3.Connection) -> bool:
+        """
+        Move the entries of an old whole-file JSON cache into the store.
+
+        Args:
+            connection (sqlite3.Connection): The freshly opened store connection.
+
+        Returns:
+            bool: True if a legacy file was imported.
+        """
+        if not os.path.exists(self.cache_file):
+            return False
+        try:
+            with open(self.cache_file, "r") as f:
+                legacy_cache = json.load(f, object_hook=_json_object_hook)
+        except (json.JSONDecodeError, OSError):
+            legacy_cache = {}
+        rows = []
+        for key, entry in legacy_cache.items():
+            if self.timed:
+                if isinstance(entry, dict) and "timestamp" in entry and "result" in entry:
+                    rows.append((key, entry["timestamp"], json.dumps(entry["result"], default=_json_default)))
+            else:
+                rows.append((key, None, json.dumps(entry, default=_json_default)))
+        connection.executemany('INSERT OR IGNORE INTO cache (key, timestamp, payload) VALUES (?, ?, ?);', rows)
+        connection.commit()
+        os.remove(self.cache_file)
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        self._ensure_open()
+        return key in self.index
+
+    def __len__(self) -> int:
+        if self.connection is None and not os.path.exists(self.db_file) and not os.path.exists(self.cache_file):
+            return 0  # nichts gespeichert, für eine Statistik keine leere Datei anlegen
+        self._ensure_open()
+        return len(self.index)
+
+    def disk_bytes(self) -> int:
+        """
+        Returns:
+            int: Size of the SQLite file (including a write-ahead log) in bytes.
+        """
+        return sum(os.path.getsize(path) for path in (self.db_file, self.db_file + "-wal") if os.path.exists(path))
+
+    def timestamp(self, key: str) -> float | None:
+        """
+        Get the time an entry was stored.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            float or None: Unix timestamp of the entry, None for untimed or missing entries.
+        """
+        self._ensure_open()
+        return self.index.get(key)
+
+    def load(self, key: str):
+        """
+        Read and deserialize a single entry.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            The cached value.
+
+        Raises:
+            KeyError: If the key is not stored or the payload can not be decoded.
+        """
+        self._ensure_open()
+        with self.lock:
+            if key in self.pending:
+                row = (self.pending[key][1],)
+            else:
+                row = self.connection.execute('SELECT payload FROM cache WHERE key = ?;', (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        try:
+            return _decode_payload(row[0])
+        except (ValueError, KeyError):
+            raise KeyError(key)
+
+    def store(self, key: str, value, timestamp: float | None = None) -> None:
+        """
+        Write a single entry. It is visible immediately and reaches the disk with the next flush().
+
+        Args:
+            key (str): The cache key.
+            value: The value to store, must be JSON serializable (see _json_default).
+            timestamp (float or None): Unix timestamp of the entry.
+        """
+        self._ensure_open()
+        if self.columnar:
+            payload = _encode_columnar(value)
+        else:
+            payload = json.dumps(value, default=_json_default)
+        with self.lock:
+            self.pending[key] = (timestamp, payload)
+            self.index[key] = timestamp
+            if self.flush_timer is None:
+                self.flush_timer = threading.Timer(self.FLUSH_INTERVAL, self.flush)
+                self.flush_timer.daemon = True
+                self.flush_timer.start()
+
+    def flush(self) -> None:
+        """
+        Write all buffered entries in a single transaction.
+        """
+        with self.lock:
+            if self.flush_timer is not None:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+            if not self.pending or self.connection is None:
+                return
+            rows = [(key, timestamp, payload) for key, (timestamp, payload) in self.pending.items()]
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO cache (key, timestamp, payload) VALUES (?, ?, ?);', rows)
+            self.pending.clear()
+
+    def purge_expired(self, ttl_seconds: int) -> None:
+        """
+        Delete all entries older than ttl_seconds.
+
+        Args:
+            ttl_seconds (int): Lifetime of an entry in seconds.
+        """
+        self._ensure_open()
+        deadline = time.time() - ttl_seconds
+        with self.lock:
+            self.connection.execute('DELETE FROM cache WHERE timestamp <= ?;', (deadline,))
+            self.connection.commit()
+            expired = [key for key, timestamp in self.index.items() if timestamp is not None and timestamp <= deadline]
+            for key in expired:
+                del self.index[key]
+                self.pending.pop(key, None)
+
+
+CACHE_STATS_FILE = "cache_stats.json"
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))  # upper bounds in seconds
+CACHE_REGISTRY: dict[str, "CacheStats"] = {}
+
+
+class CacheStats:
+    """
+    Counters of one cached function: hits, misses, stale serves, coalesced calls, background
+    refreshes, evictions, expiries and a histogram of the upstream call latency.
+    Misses count only callers that waited for an upstream call, background refreshes of
+    stale-while-revalidate caches are counted as refreshes.
+    Every instance registers itself in CACHE_REGISTRY under "module.function".
+    """
+    COUNTERS = ('hits', 'misses', 'stale', 'coalesced', 'refreshes', 'evictions', 'expired')
+
+    def __init__(self, func, kind: str, ttl_seconds: int | None, store: "CacheStore | None" = None) -> None:
+        """
+        Args:
+            func: The decorated function.
+            kind (str): "memory" for timed_cache, "persistent" for the SQLite backed decorators.
+            ttl_seconds (int or None): Lifetime of an entry, None if entries never expire.
+            store (CacheStore or None): The on-disk store of persistent caches.
+        """
+        self.name = f"{func.__module__}.{func.__qualname__}"
+        self.kind = kind
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.latency_counts = [0] * len(LATENCY_BUCKETS)
+        self.latency_total = 0.0
+        self.memory_usage = lambda: (0, 0)  # (entries, bytes), set by the in-memory decorator
+        CACHE_REGISTRY[self.name] = self
+
+    def count(self, counter: str, n: int = 1) -> None:
+        with self.lock:
+            self.counters[counter] += n
+
+    def record_latency(self, seconds: float) -> None:
+        """
+        Args:
+            seconds (float): Duration of one upstream call of the decorated function.
+        """
+        with self.lock:
+            self.latency_total += seconds
+            self.latency_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: Counters, latency histogram, entry count, memory bytes and on-disk bytes of this session.
+        """
+        if self.store is not None:
+            entries, memory_bytes = len(self.store), None
+            disk_bytes = self.store.disk_bytes()
+        else:
+            (entries, memory_bytes), disk_bytes = self.memory_usage(), None
+        with self.lock:
+            data = dict(self.counters)
+            data.update(name=self.name, kind=self.kind, ttl_seconds=self.ttl_seconds,
+                        latency_counts=list(self.latency_counts), latency_total=self.latency_total)
+        data.update(entries=entries, memory_bytes=memory_bytes, disk_bytes=disk_bytes)
+        return data
+
+
+def _load_saved_cache_stats(stats_file: str) -> dict:
+    if not os.path.exists(stats_file):
+        return {}
+    try:
+        with open(stats_file, "r") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+
+
+def save_cache_stats(stats_file: str = CACHE_STATS_FILE) -> None:
+    """
+    Add the counters of this session to the totals in stats_file and reset them.
+    Called automatically at interpreter exit.
+
+    Args:
+        stats_file (str): Path of the JSON file holding the accumulated statistics.
+    """
+    saved = _load_saved_cache_stats(stats_file)
+    changed = False
+    for name, stats in CACHE_REGISTRY.items():
+        with stats.lock:
+            if not any(stats.counters.values()):
+                continue
+            entry = saved.setdefault(name, {})
+            for counter in CacheStats.COUNTERS:
+                entry[counter] = entry.get(counter, 0) + stats.counters[counter]
+                stats.counters[counter] = 0
+            latency_counts = entry.get('latency_counts', [0] * len(LATENCY_BUCKETS))
+            entry['latency_counts'] = [a + b for a, b in zip(latency_counts, stats.latency_counts)]
+            entry['latency_total'] = entry.get('latency_total', 0.0) + stats.latency_total
+            stats.latency_counts = [0] * len(LATENCY_BUCKETS)
+            stats.latency_total = 0.0
+            changed = True
+    if changed:
+        atomic_write_json(stats_file, saved, indent=4)
+
+
+atexit.register(save_cache_stats)
+
+
+def _latency_percentile(latency_counts: list[int], percentile: float) -> float | None:
+    """Upper bound of the histogram bucket containing the given percentile (0..1)."""
+    total = sum(latency_counts)
+    if total == 0:
+        return None
+    running = 0
+    for upper_bound, count in zip(LATENCY_BUCKETS, latency_counts):
+        running += count
+        if running >= percentile * total:
+            return upper_bound
+    return LATENCY_BUCKETS[-1]
+
+
+def cache_stats_report(include_saved: bool = True, stats_file: str = CACHE_STATS_FILE) -> list[dict]:
+    """
+    Collect the statistics of all registered caches.
+
+    Args:
+        include_saved (bool): Add the totals of earlier sessions stored in stats_file.
+        stats_file (str): Path of the JSON file holding the accumulated statistics.
+
+    Returns:
+        list[dict]: One dict per cached function, sorted by name, with the counters plus
+            hit_ratio, entries, memory_bytes, disk_bytes, latency_mean, latency_p50 and latency_p95.
+    """
+    saved = _load_saved_cache_stats(stats_file) if include_saved else {}
+    report = []
+    for name in sorted(CACHE_REGISTRY):
+        data = CACHE_REGISTRY[name].snapshot()
+        previous = saved.get(name, {})
+        for counter in CacheStats.COUNTERS:
+            data[counter] += previous.get(counter, 0)
+        if 'latency_counts' in previous:
+            data['latency_counts'] = [a + b for a, b in zip(data['latency_counts'], previous['latency_counts'])]
+        data['latency_total'] += previous.get('latency_total', 0.0)
+        # Aufrufer, die auf einen laufenden Abruf gewartet haben, bekamen ebenfalls ein gemeinsames Ergebnis
+        served = data['hits'] + data['stale'] + data['coalesced']
+        lookups = served + data['misses']
+        data['hit_ratio'] = served / lookups if lookups else None
+        calls = sum(data['latency_counts'])
+        data['latency_mean'] = data['latency_total'] / calls if calls else None
+        data['latency_p50'] = _latency_percentile(data['latency_counts'], 0.5)
+        data['latency_p95'] = _latency_percentile(data['latency_counts'], 0.95)
+        report.append(data)
+    return report
+
+
+def format_bytes(size: int | None) -> str:
+    """
+    Format a byte count for display, e.g. 1536 -> "1.5 KB".
+
+    Args:
+        size (int or None): Number of bytes.
+
+    Returns:
+        str: Human readable size, "" for None.
+    """
+    if size is None:
+        return ""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def format_seconds(seconds: float | None) -> str:
+    """
+    Format a latency for display, e.g. 0.25 -> "250 ms".
+
+    Args:
+        seconds (float or None): Duration in seconds.
+
+    Returns:
+        str: Human readable duration, "" for None.
+    """
+    if seconds is None:
+        return ""
+    if seconds == float("inf"):
+        return f"> {LATENCY_BUCKETS[-2]:.0f} s"
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} ms"
+    return f"{seconds:.1f} s"
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+    The first caller runs the function, callers arriving while it is in flight
+    wait for it and get the same result (or exception).
+    """
+
+    def __init__(self, stats: CacheStats | None = None) -> None:
+        """
+        Args:
+            stats (CacheStats or None): Counts callers served by another caller's execution as "coalesced".
+        """
+        self.lock = threading.Lock()
+        self.calls: dict = {}  # key -> [event, result, exception]
+        self.stats = stats
+
+    def do(self, key, fn, count: bool = True):
+        """
+        Run fn() for key unless a call for the same key is already running.
+
+        Args:
+            key: Hashable key identifying the call.
+            fn: Function without arguments computing the result.
+            count (bool): Count this call as "coalesced" if it joins a running one
+                (False for background refreshes, which are no callers).
+
+        Returns:
+            The result of fn().
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = [threading.Event(), None, None]
+        if not leader and count and self.stats is not None:
+            self.stats.count('coalesced')
+        if not leader:
+            call[0].wait()
+            if call[2] is not None:
+                raise call[2]
+            return call[1]
+        try:
+            call[1] = fn()
+            return call[1]
+        except BaseException as e:
+            call[2] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call[0].set()
+
+
+def _approx_size(obj, seen: set | None = None) -> int:
+    """
+    Estimate the deep memory size of an object in bytes.
+    Containers are walked recursively, pandas objects report their own memory usage.
+
+    Args:
+        obj: The object to measure.
+        seen (set or None): Ids of objects already counted (internal).
+
+    Returns:
+        int: Approximate size in bytes.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approx_size(k, seen) + _approx_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_approx_size(item, seen) for item in obj)
+    return size
+
+
+# background refreshes of stale-while-revalidate caches
+_REVALIDATE_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-revalidate")
+_REFRESH_LISTENERS = []
+
+
+def add_refresh_listener(callback) -> None:
+    """
+    Register a callback that is invoked when a stale-while-revalidate cache got fresh data.
+    The callback runs in a background thread as callback(func, args, kwargs, result),
+    GUI code has to hand it over to the Tk main loop (e.g. with widget.after()).
+
+    Args:
+        callback: Function to call after a background refresh.
+    """
+    _REFRESH_LISTENERS.append(callback)
+
+
+def revalidate_in_background(func, args, kwargs, refreshing: set, lock, key, fetch) -> None:
+    """
+    Run fetch() in the revalidation pool unless a refresh for key is already queued,
+    then notify all refresh listeners with callback(func, args, kwargs, result).
+
+    Args:
+        func: The cached function, passed on to the listeners.
+        args (tuple): Its positional arguments.
+        kwargs (dict): Its keyword arguments.
+        refreshing (set): Keys with a queued refresh, shared by all calls of the cache.
+        lock: Lock guarding refreshing.
+        key: Key of the refreshed entry.
+        fetch: Function without arguments fetching and storing the fresh result.
+    """
+    with lock:
+        if key in refreshing:
+            return
+        refreshing.add(key)
+
+    def refresh():
+        try:
+            result = fetch()
+        except Exception as e:
+            print(f"Error: Background refresh of {func.__name__} failed: {e}")
+            return
+        finally:
+            with lock:
+                refreshing.discard(key)
+        for callback in list(_REFRESH_LISTENERS):
+            try:
+                callback(func, args, kwargs, result)
+            except Exception as e:
+                print(f"Error: Cache refresh listener failed: {e}")
+
+    _REVALIDATE_EXECUTOR.submit(refresh)
+
+
+def _timed_call(stats: CacheStats, func, args: tuple, kwargs: dict):
+    """Call func and record the upstream latency in stats."""
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        stats.record_latency(time.perf_counter() - start)
+
+
 # decorators for caching
-def timed_cache(ttl_seconds: int = 300):
+def timed_cache(ttl_seconds: int = 300, max_entries: int | None = None, max_bytes: int | None = None,
+                stale_while_revalidate: int = 0):
     """
     Decorator for time-based caching.
     Stores the result of a function for ttl_seconds seconds.
+    The cache is bounded: if max_entries or max_bytes is exceeded, the least recently
+    used entries are evicted. Expired entries are swept out once per ttl_seconds.
+    With stale_while_revalidate, an expired result is returned immediately for that many
+    further seconds while a background worker fetches a fresh one (see add_refresh_listener).
+    The decorated function gets cache_info(), cache_clear(), cache_put(result, *args, **kwargs),
+    cache_contains(*args, **kwargs) and cache_peek(*args, **kwargs) attributes.
 
     Args:
         ttl_seconds (int): Lifetime of the cache in seconds.
+        max_entries (int or None): Maximum number of cached results, None for unlimited.
+        max_bytes (int or None): Maximum approximate memory of all cached results, None for unlimited.
+        stale_while_revalidate (int): Seconds after expiry during which the old result is still served.
 
     Returns:
         Decorated function with caching.
     """
 
     def decorator(func):
-        cache = {}
+        cache = OrderedDict()  # key -> (result, timestamp, size), ältester Zugriff zuerst
+        memory = {'bytes': 0, 'last_sweep': time.time()}
+        lock = threading.RLock()
+        stats = CacheStats(func, "memory", ttl_seconds)
+        stats.memory_usage = lambda: (len(cache), memory['bytes'] if max_bytes is not None else None)
+        flights = SingleFlight(stats)
+        refreshing = set()
+        max_age = ttl_seconds + stale_while_revalidate
+
+        def remove(key):
+            _, _, size = cache.pop(key)
+            memory['bytes'] -= size
+
+        def sweep(now):
+            expired = [key for key, (_, timestamp, _) in cache.items() if now - timestamp >= max_age]
+            for key in expired:
+                remove(key)
+            stats.count('expired', len(expired))
+            memory['last_sweep'] = now
+
+        def evict():
+            while cache and ((max_entries is not None and len(cache) > max_entries) or
+                             (max_bytes is not None and memory['bytes'] > max_bytes)):
+                remove(next(iter(cache)))
+                stats.count('evictions')
+
+        def put(key, result, now):
+            size = _approx_size(result) if max_bytes is not None else 0
+            with lock:
+                if key in cache:
+                    remove(key)
+                cache[key] = (result, now, size)
+                memory['bytes'] += size
+                evict()
+
+        def lookup(key, now, allow_stale=False, count=True):
+            with lock:
+                if now - memory['last_sweep'] >= ttl_seconds:
+                    sweep(now)
+                # Cache vorhanden und gültig?
+                if key in cache:
+                    result, timestamp, _ = cache[key]
+                    if now - timestamp < ttl_seconds:
+                        cache.move_to_end(key)
+                        if count:
+                            stats.count('hits')
+                        return 'fresh', result
+                    if now - timestamp < max_age:
+                        if allow_stale:
+                            cache.move_to_end(key)
+                            stats.count('stale')
+                            return 'stale', result
+                    else:
+                        remove(key)
+                        stats.count('expired')
+            return None, None
 
         @wraps(func)
         def wrapper(*args, **kwargs):
             key = (args, tuple(sorted(kwargs.items())))
-            now = time.time()
+            state, result = lookup(key, time.time(), allow_stale=stale_while_revalidate > 0)
+            if state == 'fresh':
+                return result
 
-            # Cache vorhanden und gültig?
-            if key in cache:
-                result, timestamp = cache[key]
-                if now - timestamp < ttl_seconds:
+            def fetch(counter='misses'):
+                # ein anderer Thread könnte den Eintrag inzwischen geschrieben haben
+                now = time.time()
+                state, result = lookup(key, now, count=counter == 'misses')
+                if state == 'fresh':
                     return result
+                # Neu berechnen und speichern
+                stats.count(counter)
+                result = _timed_call(stats, func, args, kwargs)
+                put(key, result, now)
+                return result
+
+            if state == 'stale':
+                # alten Wert sofort liefern, im Hintergrund aktualisieren
+                revalidate_in_background(func, args, kwargs, refreshing, lock, key,
+                                         lambda: flights.do(key, lambda: fetch('refreshes'), count=False))
+                return result
+            return flights.do(key, fetch)
+
+        def cache_info() -> dict:
+            """
+            Returns:
+                dict: hits, misses, stale (expired results served while revalidating), coalesced (callers
+                      that waited for a running fetch), refreshes (background fetches of stale
+                      results), evictions, expired, entries and bytes
+                      (only tracked if max_bytes is set) of the current session.
+            """
+            with lock:
+                info = dict(stats.counters)
+                info.update(entries=len(cache), bytes=memory['bytes'])
+                return info
 
-            # Neu berechnen und speichern
-            result = func(*args, **kwargs)
-            cache[key] = (result, now)
-            return result
+        def cache_clear() -> None:
+            """Removes all cached results."""
+            with lock:
+                cache.clear()
+                memory['bytes'] = 0
 
+        def cache_put(result, *args, **kwargs) -> None:
+            """
+            Stores result as if func(*args, **kwargs) had just returned it, e.g. from a batch request.
+            """
+            put((args, tuple(sorted(kwargs.items()))), result, time.time())
+
+        def cache_contains(*args, **kwargs) -> bool:
+            """
+            Returns:
+                bool: True if a fresh result for func(*args, **kwargs) is cached (not counted as hit).
+            """
+            with lock:
+                entry = cache.get((args, tuple(sorted(kwargs.items()))))
+                return entry is not None and time.time() - entry[1] < ttl_seconds
+
+        def cache_peek(*args, **kwargs) -> tuple:
+            """
+            Returns:
+                tuple: ('fresh', result), ('stale', result) within the stale_while_revalidate window,
+                       or (None, None). Neither counted nor revalidated, the caller decides what to fetch.
+            """
+            with lock:
+                entry = cache.get((args, tuple(sorted(kwargs.items()))))
+            if entry is None:
+                return None, None
+            age = time.time() - entry[1]
+            if age < ttl_seconds:
+                return 'fresh', entry[0]
+            if age < max_age:
+                return 'stale', entry[0]
+            return None, None
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_put = cache_put
+        wrapper.cache_contains = cache_contains
+        wrapper.cache_peek = cache_peek
+        wrapper.cache_stats = stats
         return wrapper
 
     return decorator
 
 
-def persistent_cache(cache_file: str):
+class HotCache:
+    """
+    Small thread-safe in-memory LRU in front of a CacheStore.
+    It is keyed by the raw call arguments and remembers the hashed store key,
+    so repeated hits cost a dict lookup instead of JSON serialization, hashing and decoding.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        """
+        Args:
+            max_entries (int): Maximum number of entries kept in memory.
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # call key -> (result, timestamp, store key)
+        self.lock = threading.Lock()
+
+    def get(self, call_key):
+        """
+        Args:
+            call_key: Key from _call_key(), None is never cached.
+
+        Returns:
+            tuple or None: (result, timestamp, store key) or None if not cached.
+        """
+        if call_key is None:
+            return None
+        with self.lock:
+            entry = self.entries.get(call_key)
+            if entry is not None:
+                self.entries.move_to_end(call_key)
+            return entry
+
+    def put(self, call_key, result, timestamp: float | None, store_key: str) -> None:
+        """
+        Args:
+            call_key: Key from _call_key(), None is never cached.
+            result: The cached value.
+            timestamp (float or None): Time the value was stored.
+            store_key (str): The hashed key of the value in the CacheStore.
+        """
+        if call_key is None:
+            return
+        with self.lock:
+            self.entries[call_key] = (result, timestamp, store_key)
+            self.entries.move_to_end(call_key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+def _call_key(args: tuple, kwargs: dict):
+    """
+    Cheap in-memory key for a call.
+    The common single string argument (a ticker symbol, an URL) is used as it is.
+
+    Returns:
+        The key, or None if the arguments are not hashable (e.g. a list argument).
+    """
+    if not kwargs and len(args) == 1 and type(args[0]) is str:
+        return args[0]
+    key = (args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _store_key(args: tuple, kwargs: dict, default) -> str:
+    """
+    Stable key of a call in the persistent CacheStore (SHA-256 over the JSON encoded arguments).
+
+    Args:
+        args (tuple): Positional arguments of the call.
+        kwargs (dict): Keyword arguments of the call.
+        default: JSON default function for non serializable arguments.
+
+    Returns:
+        str: Hex digest used as store key.
+    """
+    key_raw = json.dumps({'args': args, 'kwargs': kwargs}, sort_keys=True, default=default)
+    return hashlib.sha256(key_raw.encode()).hexdigest()
+
+
+def persistent_cache(cache_file: str, hot_entries: int = 256):
     """
     Decorator for persistent file-based caching.
-    Stores function calls and their results in a JSON file.
+    Stores function calls and their results in an SQLite key/value store next to cache_file.
+    The most recently used results are additionally kept in memory (see HotCache).
 
     Args:
         cache_file (str): Path to the cache file.
+        hot_entries (int): Number of results kept in memory.
 
     Returns:
         Decorated function with persistent caching.
     """
-    # Cache laden
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, "r") as f:
-                cache = json.load(f, object_hook=_json_object_hook)
-        except json.JSONDecodeError:
-            cache = {}
-    else:
-        cache = {}
+    # Cache wird erst beim ersten Aufruf geöffnet, dann wird nur der Index geladen
+    cache = CacheStore(cache_file)
 
     def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Schlüssel generieren (hash bar, auch bei komplexen args)
-            key_raw = json.dumps({'args': args, 'kwargs': kwargs}, sort_keys=True, default=str)
-            key = hashlib.sha256(key_raw.encode()).hexdigest()
+        stats = CacheStats(func, "persistent", None, cache)
+        flights = SingleFlight(stats)
+        hot = HotCache(hot_entries)
 
+        def lookup(key):
             if key in cache:
-                return cache[key]
+                try:
+                    return True, cache.load(key)
+                except KeyError:
+                    pass
+            return False, None
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            call_key = _call_key(args, kwargs)
+            hot_entry = hot.get(call_key)
+            if hot_entry is not None:
+                stats.count('hits')
+                return hot_entry[0]
 
-            result = func(*args, **kwargs)
-            cache[key] = result
+            # Schlüssel generieren (hash bar, auch bei komplexen args)
+            key = _store_key(args, kwargs, str)
+            hit, result = lookup(key)
+            if hit:
+                stats.count('hits')
+                hot.put(call_key, result, None, key)
+                return result
 
-            # Cache speichern
-            with open(cache_file, "w") as cache_file_ref:
-                json.dump(cache, cache_file_ref, default=_json_default)
+            def fetch():
+                hit, result = lookup(key)
+                if hit:
+                    return result
+                stats.count('misses')
+                result = _timed_call(stats, func, args, kwargs)
+                # nur der neue Eintrag wird geschrieben
+                cache.store(key, result)
+                hot.put(call_key, result, None, key)
+                return result
 
-            return result
+            return flights.do(key, fetch)
 
+        wrapper.cache_stats = stats
         return wrapper
 
     return decorator
 
 
-def persistent_timed_cache(cache_file: str, ttl_seconds: int = 86400):
+def persistent_timed_cache(cache_file: str, ttl_seconds: int = 86400, stale_while_revalidate: int = 0,
+                           columnar: bool = False, hot_entries: int = 256):
     """
     Dekorator für persistenten, zeitbasierten Cache.
-    Speichert Ergebnisse in einer JSON-Datei und prüft die Gültigkeit per TTL.
+    Speichert Ergebnisse in einem SQLite Key/Value Store und prüft die Gültigkeit per TTL.
+    Mit stale_while_revalidate wird ein abgelaufenes Ergebnis noch so viele Sekunden sofort
+    geliefert, während es im Hintergrund neu geholt wird (siehe add_refresh_listener).
+    Mit columnar werden Dicts aus DatetimeIndex/NumPy-Spalten binär gespeichert (z.B. OHLCV-Historien).
+    Die zuletzt benutzten hot_entries Ergebnisse werden zusätzlich im Speicher gehalten (siehe HotCache).
     """
 
     def decorator(func):
-        # Cache laden
-        if os.path.exists(cache_file):
+        # Cache wird erst beim ersten Aufruf geöffnet, abgelaufene Einträge werden im Hintergrund entfernt
+        cache = CacheStore(cache_file, timed=True, ttl_seconds=ttl_seconds + stale_while_revalidate,
+                           columnar=columnar)
+        stats = CacheStats(func, "persistent", ttl_seconds, cache)
+        flights = SingleFlight(stats)
+        hot = HotCache(hot_entries)
+        lock = threading.Lock()
+        refreshing = set()
+
+        def freshness(timestamp, now, allow_stale):
+            age = now - timestamp
+            if age < ttl_seconds:
+                return 'fresh'
+            if allow_stale and age < ttl_seconds + stale_while_revalidate:
+                return 'stale'
+            return None
+
+        def lookup(key, now, allow_stale=False):
+            # Prüfen, ob Cache gültig ist
+            timestamp = cache.timestamp(key)
+            if timestamp is None:
+                return None, None, None
+            state = freshness(timestamp, now, allow_stale)
+            if state is None:
+                return None, None, None
             try:
-                with open(cache_file, "r") as f:
-                    cache = json.load(f, object_hook=_json_object_hook)
-            except json.JSONDecodeError:
-                cache = {}
-        else:
-            cache = {}
-        # clean up old cache entries
-        now = time.time()
-        keys_to_delete = []
-        for key, entry in cache.items():
-            if isinstance(entry, dict) and "timestamp" in entry:
-                if now - entry["timestamp"] >= ttl_seconds:
-                    keys_to_delete.append(key)
-        for key in keys_to_delete:
-            del cache[key]
-        with open(cache_file, "w") as cache_file_ref:
-            json.dump(cache, cache_file_ref, default=_json_default)
+                return state, cache.load(key), timestamp
+            except KeyError:
+                return None, None, None
 
         @wraps(func)
         def wrapper(*args, **kwargs):
-            key_raw = json.dumps({'args': args, 'kwargs': kwargs}, sort_keys=True, default=_json_default)
-            key = hashlib.sha256(key_raw.encode()).hexdigest()
             now = time.time()
+            allow_stale = stale_while_revalidate > 0
+            call_key = _call_key(args, kwargs)
+            hot_entry = hot.get(call_key)
+            if hot_entry is not None:
+                result, timestamp, key = hot_entry
+                state = freshness(timestamp, now, allow_stale)
+            else:
+                key = _store_key(args, kwargs, _json_default)
+                state, result, timestamp = lookup(key, now, allow_stale)
+                if state is not None:
+                    hot.put(call_key, result, timestamp, key)
+            if state == 'fresh':
+                stats.count('hits')
+                return result
 
-            # Prüfen, ob Cache gültig ist
-            if key in cache:
-                entry = cache[key]
-                if isinstance(entry, dict) and "timestamp" in entry and "result" in entry:
-                    if now - entry["timestamp"] < ttl_seconds:
-                        return entry["result"]
+            def fetch(counter='misses'):
+                now = time.time()
+                state, result, _ = lookup(key, now)
+                if state == 'fresh':
+                    if counter == 'misses':
+                        stats.count('hits')
+                    return result
+                # Neu berechnen und speichern
+                stats.count(counter)
+                result = _timed_call(stats, func, args, kwargs)
+                cache.store(key, result, now)
+                hot.put(call_key, result, now, key)
+                return result
 
-            # Neu berechnen und speichern
-            result = func(*args, **kwargs)
-            cache[key] = {"result": result, "timestamp": now}
-            with open(cache_file, "w") as cache_file_ref:
-                json.dump(cache, cache_file_ref, default=_json_default)
-            return result
+            if state == 'stale':
+                # alten Wert sofort liefern, im Hintergrund aktualisieren
+                stats.count('stale')
+                revalidate_in_background(func, args, kwargs, refreshing, lock, key,
+                                         lambda: flights.do(key, lambda: fetch('refreshes'), count=False))
+                return result
+            return flights.do(key, fetch)
 
+        wrapper.cache_stats = stats
         return wrapper
 
     return decorator
@@ -289,3 +1239,133 @@ class ToolTip:
         self.label = None
         if tw:
             tw.destroy()
+
+
+class GuiQueue:
+    """
+    Hands callbacks from background threads to the Tk main loop. Tkinter is not thread-safe,
+    so threads only put callbacks into a queue.Queue; the Tk thread drains it periodically
+    with widget.after(). Callbacks posted before the polling starts run on the first poll.
+    """
+
+    def __init__(self, interval_ms: int = 50) -> None:
+        """
+        Args:
+            interval_ms (int): Polling interval of the Tk thread in milliseconds.
+        """
+        self.interval_ms = interval_ms
+        self.queue = queue.Queue()
+        self.widget: tk.Misc | None = None
+
+    def post(self, callback, *args) -> None:
+        """
+        Run callback(*args) on the Tk thread. Safe to call from any thread.
+
+        Args:
+            callback: Function to call.
+            *args: Its arguments.
+        """
+        self.queue.put((callback, args))
+
+    def start(self, widget: tk.Misc) -> None:
+        """
+        Start polling. Must be called on the Tk thread.
+
+        Args:
+            widget: Widget whose after() schedules the polling, usually the main window.
+        """
+        self.widget = widget
+        self.poll()
+
+    def poll(self) -> None:
+        """Run all queued callbacks and schedule the next poll (Tk thread only)."""
+        while True:
+            try:
+                callback, args = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error: GUI callback {getattr(callback, '__name__', callback)} failed: {e}")
+        if self.widget is not None:
+            self.widget.after(self.interval_ms, self.poll)
+
+    def run_in_background(self, work, on_done, on_error=None) -> threading.Thread:
+        """
+        Run work() in a daemon thread and hand its result to on_done(result) on the Tk thread,
+        so slow fetches never block the main loop.
+
+        Args:
+            work: Function without arguments, runs in the background thread (no Tk calls).
+            on_done: Called with the result on the Tk thread.
+            on_error: Called with the exception on the Tk thread, None to only print it.
+
+        Returns:
+            threading.Thread: The started thread.
+        """
+        def run():
+            try:
+                result = work()
+            except Exception as e:
+                if on_error is not None:
+                    self.post(on_error, e)
+                else:
+                    print(f"Error: Background task {getattr(work, '__name__', work)} failed: {e}")
+                return
+            self.post(on_done, result)
+
+        thread = threading.Thread(target=run, name="gui-background", daemon=True)
+        thread.start()
+        return thread
+
+
+GUI_QUEUE = GuiQueue()
+
+
+def format_cache_stats(report: list[dict]) -> str:
+    """
+    Render the result of cache_stats_report() as a plain text table.
+
+    Args:
+        report (list[dict]): Statistics as returned by cache_stats_report().
+
+    Returns:
+        str: The table.
+    """
+    header = ("Function", "TTL", "Hit %", "Hits", "Stale", "Misses", "Coal.", "Refr.", "Evict.", "Entries",
+              "Memory", "Disk", "Ø Latency", "p95")
+    rows = [header]
+    for data in report:
+        rows.append((data['name'],
+                     f"{data['ttl_seconds']} s" if data['ttl_seconds'] is not None else "∞",
+                     f"{data['hit_ratio'] * 100:.1f}" if data['hit_ratio'] is not None else "",
+                     str(data['hits']), str(data['stale']), str(data['misses']), str(data['coalesced']),
+                     str(data['refreshes']), str(data['evictions']), str(data['entries']),
+                     format_bytes(data['memory_bytes']), format_bytes(data['disk_bytes']),
+                     format_seconds(data['latency_mean']), format_seconds(data['latency_p95'])))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = ["  ".join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                       for i, (cell, width) in enumerate(zip(row, widths))) for row in rows]
+    lines.insert(1, "-" * len(lines[0]))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m tools", description="Utilities of The Portfolio.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("cache-stats", help="Show hit ratio, latency and size of all caches "
+                                              "(accumulated over all sessions).")
+    arguments = parser.parse_args()
+
+    if arguments.command == "cache-stats":
+        # the caches register themselves in the "tools" module when their modules are imported,
+        # not in this "__main__" copy of it
+        import tools
+        import stockdata
+        import RSS_Crawler
+        import WWW_Crawler
+
+        print(tools.format_cache_stats(tools.cache_stats_report()))